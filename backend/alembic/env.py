@@ -26,6 +26,7 @@ from app.models.api_keys import APIKey
 from app.models.team import Team
 from app.models.notification import Notification
 from app.models.deployment import Deployment, DeploymentStep
+from app.models.incident_outbox import IncidentOutbox
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,46 @@
+"""Add covering columns to the alert dedup index
+
+Revision ID: 0a9e4c7b3d58
+Revises: f6c3a9d2e481
+Create Date: 2026-10-17 12:26:14.530862
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a9e4c7b3d58'
+down_revision: Union[str, Sequence[str], None] = 'f6c3a9d2e481'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _swap_dedup_index(include) -> None:
+    # Build the replacement alongside the old index so the UPSERT always has an arbiter
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'uq_alerts_org_fingerprint_new',
+            'alerts',
+            ['organization_id', 'fingerprint'],
+            unique=True,
+            postgresql_include=include,
+            postgresql_concurrently=True
+        )
+        op.drop_index(
+            'uq_alerts_org_fingerprint',
+            table_name='alerts',
+            postgresql_concurrently=True
+        )
+    op.execute('ALTER INDEX uq_alerts_org_fingerprint_new RENAME TO uq_alerts_org_fingerprint')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _swap_dedup_index(['id', 'incident_id', 'status'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _swap_dedup_index([])
@@ -0,0 +1,40 @@
+"""Add keyset pagination index for the alert list
+
+Revision ID: 3d8f1b6e0c27
+Revises: 0a9e4c7b3d58
+Create Date: 2026-10-17 12:58:40.117352
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3d8f1b6e0c27'
+down_revision: Union[str, Sequence[str], None] = '0a9e4c7b3d58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_alerts_org_created_at_id',
+            'alerts',
+            ['organization_id', sa.text('created_at DESC'), sa.text('id DESC')],
+            unique=False,
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_alerts_org_created_at_id',
+            table_name='alerts',
+            postgresql_concurrently=True
+        )
@@ -0,0 +1,35 @@
+"""Add pgvector embeddings to incidents
+
+Revision ID: 5c1e9a7b2d40
+Revises: 14fb53bae0af
+Create Date: 2026-10-17 09:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from pgvector.sqlalchemy import Vector
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e9a7b2d40'
+down_revision: Union[str, Sequence[str], None] = '14fb53bae0af'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+    op.add_column('incidents', sa.Column('embedding', Vector(512), nullable=True))
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_incidents_embedding_hnsw "
+        "ON incidents USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_incidents_embedding_hnsw")
+    op.drop_column('incidents', 'embedding')
@@ -0,0 +1,57 @@
+"""Add incident outbox
+
+Revision ID: 7b1e4f9a2c63
+Revises: 3d8f1b6e0c27
+Create Date: 2026-10-17 13:41:06.528814
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b1e4f9a2c63'
+down_revision: Union[str, Sequence[str], None] = '3d8f1b6e0c27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('incident_outbox',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('organization_id', sa.UUID(), nullable=False),
+    sa.Column('alert_id', sa.UUID(), nullable=False),
+    sa.Column('incident_id', sa.UUID(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['alert_id'], ['alerts.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_incident_outbox_created_at'), 'incident_outbox', ['created_at'], unique=False)
+    # Wake the incident creator once per inserting statement; NOTIFY is delivered on commit
+    op.execute("""
+        CREATE FUNCTION notify_incident_outbox() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('incident_outbox', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER incident_outbox_notify
+        AFTER INSERT ON incident_outbox
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_incident_outbox()
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS incident_outbox_notify ON incident_outbox")
+    op.execute("DROP FUNCTION IF EXISTS notify_incident_outbox()")
+    op.drop_index(op.f('ix_incident_outbox_created_at'), table_name='incident_outbox')
+    op.drop_table('incident_outbox')
@@ -0,0 +1,72 @@
+"""Rehash alert fingerprints with BLAKE2b
+
+Revision ID: 8b2f6d41c9e3
+Revises: 5c1e9a7b2d40
+Create Date: 2026-10-17 10:03:51.402117
+
+"""
+from typing import Sequence, Union
+import hashlib
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2f6d41c9e3'
+down_revision: Union[str, Sequence[str], None] = '5c1e9a7b2d40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+
+def _blake2b_fingerprint(external_id, title, service, source, environment) -> str:
+    # Must stay in sync with AlertService.generate_alert_fingerprint
+    fingerprint_bytes = "\0".join((
+        external_id,
+        title,
+        service or "unknown",
+        source,
+        environment or "unknown"
+    )).encode()
+    return hashlib.blake2b(fingerprint_bytes, digest_size=16).hexdigest()
+
+
+def _md5_fingerprint(external_id, title, service, source, environment) -> str:
+    fingerprint_data = {
+        "alert_id": external_id,
+        "title": title,
+        "service": service or "unknown",
+        "source": source,
+        "environment": environment or "unknown"
+    }
+    return hashlib.md5(json.dumps(fingerprint_data, sort_keys=True).encode()).hexdigest()
+
+
+def _rehash(fingerprint_fn) -> None:
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT id, external_id, title, service_name, source, environment FROM alerts"
+    )).fetchall()
+
+    update = sa.text("UPDATE alerts SET fingerprint = :fingerprint WHERE id = :id")
+    for start in range(0, len(rows), BATCH_SIZE):
+        batch = rows[start:start + BATCH_SIZE]
+        bind.execute(update, [
+            {"id": row.id, "fingerprint": fingerprint_fn(
+                row.external_id, row.title, row.service_name, row.source, row.environment
+            )}
+            for row in batch
+        ])
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _rehash(_blake2b_fingerprint)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _rehash(_md5_fingerprint)
@@ -0,0 +1,42 @@
+"""Add partial index on active alerts by incident
+
+Revision ID: c4a7e0d9f215
+Revises: 8b2f6d41c9e3
+Create Date: 2026-10-17 10:41:27.730514
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a7e0d9f215'
+down_revision: Union[str, Sequence[str], None] = '8b2f6d41c9e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_alerts_active_by_incident',
+            'alerts',
+            ['incident_id'],
+            unique=False,
+            postgresql_where=sa.text("status = 'ACTIVE'"),
+            postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_alerts_active_by_incident',
+            table_name='alerts',
+            postgresql_concurrently=True
+        )
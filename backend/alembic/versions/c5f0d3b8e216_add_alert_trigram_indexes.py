@@ -0,0 +1,47 @@
+"""Add trigram indexes for alert service/environment search
+
+Revision ID: c5f0d3b8e216
+Revises: a8c2e5f7d914
+Create Date: 2026-10-17 14:32:19.604471
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f0d3b8e216'
+down_revision: Union[str, Sequence[str], None] = 'a8c2e5f7d914'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # list_alerts filters with ILIKE '%term%'; a leading wildcard can't use a B-tree, a trigram GIN can
+    with op.get_context().autocommit_block():
+        for column in ('service_name', 'environment'):
+            op.create_index(
+                f'ix_alerts_{column}_trgm',
+                'alerts',
+                [column],
+                unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for column in ('service_name', 'environment'):
+            op.drop_index(
+                f'ix_alerts_{column}_trgm',
+                table_name='alerts',
+                postgresql_concurrently=True
+            )
+    # pg_trgm is left installed; other objects may depend on it
@@ -0,0 +1,77 @@
+"""Add unique index on alerts (organization_id, fingerprint)
+
+Revision ID: e2d5b8a1f376
+Revises: c4a7e0d9f215
+Create Date: 2026-10-17 11:12:05.184930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2d5b8a1f376'
+down_revision: Union[str, Sequence[str], None] = 'c4a7e0d9f215'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent webhooks could insert the same alert twice before dedup was atomic.
+    # The oldest row of each duplicate group is kept (NULL created_at counts as oldest,
+    # then lowest id) and the others are moved to alerts_fingerprint_duplicates so the
+    # unique index can build; downgrade puts them back.
+    op.execute("""
+        CREATE TEMPORARY TABLE alert_duplicate_ranks AS
+        SELECT id, organization_id, fingerprint, incident_id,
+               ROW_NUMBER() OVER (
+                   PARTITION BY organization_id, fingerprint
+                   ORDER BY created_at ASC NULLS FIRST, id
+               ) AS duplicate_rank
+        FROM alerts
+    """)
+    
+    # A kept alert without an incident takes over the oldest incident link of its duplicates
+    op.execute("""
+        UPDATE alerts kept
+        SET incident_id = linked.incident_id
+        FROM (
+            SELECT DISTINCT ON (organization_id, fingerprint) organization_id, fingerprint, incident_id
+            FROM alert_duplicate_ranks
+            WHERE duplicate_rank > 1 AND incident_id IS NOT NULL
+            ORDER BY organization_id, fingerprint, duplicate_rank
+        ) linked, alert_duplicate_ranks ranks
+        WHERE ranks.id = kept.id
+          AND ranks.duplicate_rank = 1
+          AND ranks.organization_id = linked.organization_id
+          AND ranks.fingerprint = linked.fingerprint
+          AND kept.incident_id IS NULL
+    """)
+    
+    op.execute("CREATE TABLE alerts_fingerprint_duplicates (LIKE alerts INCLUDING DEFAULTS)")
+    op.execute("""
+        WITH moved AS (
+            DELETE FROM alerts
+            WHERE id IN (SELECT id FROM alert_duplicate_ranks WHERE duplicate_rank > 1)
+            RETURNING *
+        )
+        INSERT INTO alerts_fingerprint_duplicates SELECT * FROM moved
+    """)
+    op.execute("DROP TABLE alert_duplicate_ranks")
+    
+    op.create_index(
+        'uq_alerts_org_fingerprint',
+        'alerts',
+        ['organization_id', 'fingerprint'],
+        unique=True
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_alerts_org_fingerprint', table_name='alerts')
+    # Restores the duplicates; incident links moved onto the kept alerts stay there
+    op.execute("INSERT INTO alerts SELECT * FROM alerts_fingerprint_duplicates")
+    op.execute("DROP TABLE alerts_fingerprint_duplicates")
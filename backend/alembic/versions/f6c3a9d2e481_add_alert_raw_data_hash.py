@@ -0,0 +1,29 @@
+"""Add raw_data_hash to alerts
+
+Revision ID: f6c3a9d2e481
+Revises: e2d5b8a1f376
+Create Date: 2026-10-17 11:48:36.902157
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6c3a9d2e481'
+down_revision: Union[str, Sequence[str], None] = 'e2d5b8a1f376'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing rows stay NULL and get a hash on their next update
+    op.add_column('alerts', sa.Column('raw_data_hash', sa.LargeBinary(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('alerts', 'raw_data_hash')
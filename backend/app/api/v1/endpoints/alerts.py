@@ -24,16 +24,18 @@ async def list_alerts(
     service: Optional[str] = Query(None, description="Filter by service name"),
     environment: Optional[str] = Query(None, description="Filter by environment"),
     source: Optional[AlertSource] = Query(None, description="Filter by alert source"),
-    page: int = Query(1, ge=1, description="Page number"),
+    page: int = Query(1, ge=1, description="Page number (deprecated, use cursor)", deprecated=True),
     per_page: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    include_total: bool = Query(False, description="Also return the exact filtered total"),
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
     """List alerts with filtering and pagination"""
     
     try:
-        service = AlertService(db)
-        return await service.list_alerts(
+        alert_service = AlertService(db)
+        return await alert_service.list_alerts(
             organization_id=current_user.organization_id,
             status=status,
             severity=severity,
@@ -41,8 +43,12 @@ async def list_alerts(
             environment=environment,
             source=source.value if source else None,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            cursor=cursor,
+            include_total=include_total
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error listing alerts: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve alerts")
@@ -62,26 +68,7 @@ async def get_alert(
         if not alert:
             raise HTTPException(status_code=404, detail="Alert not found")
         
-        return AlertResponse(
-            id=str(alert.id),
-            external_id=alert.external_id,
-            fingerprint=alert.fingerprint,
-            title=alert.title,
-            description=alert.description,
-            severity=alert.severity,
-            status=alert.status,
-            source=alert.source,
-            service_name=alert.service_name,
-            environment=alert.environment,
-            host=alert.host,
-            incident_id=str(alert.incident_id) if alert.incident_id else None,
-            started_at=alert.started_at,
-            ended_at=alert.ended_at,
-            created_at=alert.created_at,
-            updated_at=alert.updated_at,
-            labels=alert.labels,
-            raw_data=alert.raw_data
-        )
+        return AlertResponse.model_validate(alert)
         
     except HTTPException:
         raise
@@ -144,26 +131,7 @@ async def update_alert(
         alert.updated_at = datetime.utcnow()
         await db.commit()
         
-        return AlertResponse(
-            id=str(alert.id),
-            external_id=alert.external_id,
-            fingerprint=alert.fingerprint,
-            title=alert.title,
-            description=alert.description,
-            severity=alert.severity,
-            status=alert.status,
-            source=alert.source,
-            service_name=alert.service_name,
-            environment=alert.environment,
-            host=alert.host,
-            incident_id=str(alert.incident_id) if alert.incident_id else None,
-            started_at=alert.started_at,
-            ended_at=alert.ended_at,
-            created_at=alert.created_at,
-            updated_at=alert.updated_at,
-            labels=alert.labels,
-            raw_data=alert.raw_data
-        )
+        return AlertResponse.model_validate(alert)
         
     except HTTPException:
         raise
@@ -1,13 +1,14 @@
 # backend/app/api/v1/endpoints/auth.py - Enhanced with MFA
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, exists
 from app.database import get_async_session
 from app.models.user import User
 from app.models.organization import Organization
 from app.schemas.auth import UserCreate, UserLogin, UserResponse
-from app.core.security import verify_password, get_password_hash, create_access_token, get_current_user
+from app.core.security import verify_password, verify_password_for_missing_user, get_password_hash, create_access_token, get_current_user
 from app.core.config import settings
+import asyncio
 import uuid
 from datetime import datetime
 import pyotp
@@ -23,13 +24,12 @@ router = APIRouter()
 async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_session)):
     """Register a new user and organization"""
     try:
-        # Check if user already exists
-        result = await db.execute(
-            select(User).where(User.email == user_data.email)
-        )
-        existing_user = result.scalar_one_or_none()
+        # Check if user already exists (EXISTS: no User row is loaded just to be discarded)
+        email_taken = (await db.execute(
+            select(exists().where(User.email == user_data.email))
+        )).scalar()
         
-        if existing_user:
+        if email_taken:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="User with this email already exists"
@@ -46,10 +46,10 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_s
         
         while attempt < max_attempts:
             # Check if slug already exists
-            slug_result = await db.execute(
-                select(Organization).where(Organization.slug == slug)
-            )
-            if not slug_result.scalar_one_or_none():
+            slug_taken = (await db.execute(
+                select(exists().where(Organization.slug == slug))
+            )).scalar()
+            if not slug_taken:
                 break
             
             # Add random suffix and try again
@@ -68,12 +68,15 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_s
         db.add(organization)
         await db.flush()  # Get the organization ID
         
+        # bcrypt is deliberately slow; hash on a worker thread so the event loop keeps serving requests
+        password_hash = await asyncio.to_thread(get_password_hash, user_data.password)
+        
         # Create user
         user = User(
             id=uuid.uuid4(),
             organization_id=organization.id,
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=password_hash,
             full_name=user_data.full_name,
             role="admin",  # First user in org is admin
             is_active=True,
@@ -134,6 +137,7 @@ async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_sess
         
         if not user:
             print(f"❌ User not found: {login_data.email}")
+            await asyncio.to_thread(verify_password_for_missing_user, login_data.password)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password"
@@ -143,7 +147,7 @@ async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_sess
         
         # Verify password with detailed error handling
         try:
-            password_valid = verify_password(login_data.password, user.password_hash)
+            password_valid = await asyncio.to_thread(verify_password, login_data.password, user.password_hash)
             print(f"🔐 Password verification result: {password_valid}")
             
             if not password_valid:
@@ -1,5 +1,5 @@
 # backend/app/api/v1/endpoints/incidents.py - PRODUCTION VERSION
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, func, desc, asc
 from sqlalchemy.orm import selectinload
@@ -14,6 +14,7 @@ from app.schemas.incident import (
 )
 from app.services.ai_service import EnhancedAIService
 from app.services.deployment_service import deployment_service
+from app.services.incident_service import IncidentService, embed_new_incidents
 from typing import Optional, List
 from datetime import datetime, timedelta
 import uuid
@@ -98,6 +99,7 @@ async def get_incidents(
 @router.post("/", response_model=IncidentResponse)
 async def create_incident(
     incident_data: IncidentCreate,
+    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -142,6 +144,9 @@ async def create_incident(
         await db.commit()
         await db.refresh(new_incident)
         
+        # Embed for similar-incident search once the response is sent
+        background_tasks.add_task(embed_new_incidents, [new_incident.id])
+        
         return IncidentResponse(
             id=str(new_incident.id),
             organization_id=str(new_incident.organization_id),
@@ -206,6 +211,61 @@ async def get_incident(
         logger.error(f"Error fetching incident {incident_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Error fetching incident: {str(e)}")
 
+@router.get("/{incident_id}/similar", response_model=List[IncidentResponse])
+async def get_similar_incidents(
+    incident_id: str,
+    limit: int = Query(5, ge=1, le=20, description="Number of similar incidents"),
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the organization's incidents most similar to this one (embedding search)"""
+    try:
+        result = await db.execute(
+            select(Incident).where(
+                and_(
+                    Incident.id == incident_id,
+                    Incident.organization_id == current_user.organization_id
+                )
+            )
+        )
+        incident = result.scalar_one_or_none()
+        
+        if not incident:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        
+        similar = await IncidentService(db).find_similar_incidents(
+            incident, current_user.organization_id, limit=limit
+        )
+        responses = [
+            IncidentResponse(
+                id=str(similar_incident.id),
+                organization_id=str(similar_incident.organization_id),
+                title=similar_incident.title,
+                description=similar_incident.description or "",
+                severity=similar_incident.severity,
+                status=similar_incident.status,
+                source=similar_incident.source or "manual",
+                created_by=similar_incident.created_by_name,
+                assigned_to=similar_incident.assigned_to_name,
+                created_at=similar_incident.created_at,
+                updated_at=similar_incident.updated_at,
+                resolved_at=similar_incident.resolved_at,
+                tags=similar_incident.tags or []
+            )
+            for similar_incident in similar
+        ]
+        
+        # Keeps an embedding computed on the fly for this incident (after reading the
+        # results, which the commit expires)
+        await db.commit()
+        return responses
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching similar incidents for {incident_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Error fetching similar incidents: {str(e)}")
+
 @router.patch("/{incident_id}", response_model=IncidentResponse)
 async def update_incident(
     incident_id: str,
@@ -448,7 +508,7 @@ async def deploy_incident_solution(
             "deployment_id": deployment_id,
             "incident_id": incident_id,
             "status": "deployment_started",
-            "websocket_url": f"/api/v1/deployments/{deployment_id}/stream"
+            "websocket_url": f"/api/v1/ws/deployments/{deployment_id}"
         }
         
     except HTTPException:
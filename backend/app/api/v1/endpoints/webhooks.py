@@ -14,6 +14,7 @@ from app.database import get_async_session
 from app.models.organization import Organization  
 from app.models.integration import Integration
 from app.services.alert_service import AlertService
+from app.services.alert_ingest_batcher import alert_ingest_batcher
 from app.schemas.alert import (
     GenericAlertPayload, DatadogAlertPayload, GrafanaAlertPayload,
     AlertSeverity, AlertStatus, AlertSource
@@ -109,7 +110,6 @@ async def webhook_health():
 @router.post("/generic")
 async def generic_webhook(
     alert_data: GenericAlertPayload,
-    db: AsyncSession = Depends(get_async_session),
     organization_id: str = Depends(get_organization_from_webhook)
 ):
     """Generic webhook that accepts standardized alert format"""
@@ -117,8 +117,8 @@ async def generic_webhook(
     try:
         logger.info(f"Processing generic webhook alert: {alert_data.alert_id}")
         
-        service = AlertService(db)
-        result = await service.process_alert(alert_data, organization_id)
+        # Coalesced with concurrent webhooks into one bulk ingest
+        result = await alert_ingest_batcher.submit(alert_data, organization_id)
         
         logger.info(f"Alert processed: success={result.success}, incident_id={result.incident_id}")
         
@@ -163,14 +163,13 @@ async def datadog_webhook(
         # Handle different Datadog payload formats
         if isinstance(raw_payload, list):
             # Datadog can send multiple alerts in one webhook
-            results = []
-            for alert_payload in raw_payload:
-                datadog_alert = DatadogAlertPayload(**alert_payload)
-                generic_alert = datadog_alert.to_generic()
-                
-                service = AlertService(db)
-                result = await service.process_alert(generic_alert, organization_id)
-                results.append(result)
+            generic_alerts = [
+                DatadogAlertPayload(**alert_payload).to_generic()
+                for alert_payload in raw_payload
+            ]
+            
+            service = AlertService(db)
+            results = await service.process_alerts_bulk(generic_alerts, organization_id)
             
             return {
                 "success": all(r.success for r in results),
@@ -189,8 +188,8 @@ async def datadog_webhook(
             datadog_alert = DatadogAlertPayload(**raw_payload)
             generic_alert = datadog_alert.to_generic()
             
-            service = AlertService(db)
-            result = await service.process_alert(generic_alert, organization_id)
+            # Coalesced with concurrent webhooks into one bulk ingest
+            result = await alert_ingest_batcher.submit(generic_alert, organization_id)
             
             return {
                 "success": result.success,
@@ -224,14 +223,13 @@ async def grafana_webhook(
         # Grafana sends different payload formats
         if "alerts" in raw_payload:
             # New Grafana alerting format (v8+)
-            results = []
-            for alert in raw_payload["alerts"]:
-                grafana_alert = GrafanaAlertPayload(**alert)
-                generic_alert = grafana_alert.to_generic()
-                
-                service = AlertService(db)
-                result = await service.process_alert(generic_alert, organization_id)
-                results.append(result)
+            generic_alerts = [
+                GrafanaAlertPayload(**alert).to_generic()
+                for alert in raw_payload["alerts"]
+            ]
+            
+            service = AlertService(db)
+            results = await service.process_alerts_bulk(generic_alerts, organization_id)
             
             return {
                 "success": all(r.success for r in results),
@@ -250,8 +248,8 @@ async def grafana_webhook(
             grafana_alert = GrafanaAlertPayload(**raw_payload)
             generic_alert = grafana_alert.to_generic()
             
-            service = AlertService(db)
-            result = await service.process_alert(generic_alert, organization_id)
+            # Coalesced with concurrent webhooks into one bulk ingest
+            result = await alert_ingest_batcher.submit(generic_alert, organization_id)
             
             return {
                 "success": result.success,
@@ -273,7 +271,6 @@ async def grafana_webhook(
 @router.post("/aws-cloudwatch")
 async def aws_cloudwatch_webhook(
     request: Request,
-    db: AsyncSession = Depends(get_async_session),
     organization_id: str = Depends(get_organization_from_webhook)
 ):
     """Webhook endpoint for AWS CloudWatch alerts (via SNS)"""
@@ -315,8 +312,8 @@ async def aws_cloudwatch_webhook(
                 raw_payload=raw_payload
             )
         
-        service = AlertService(db)
-        result = await service.process_alert(generic_alert, organization_id)
+        # Coalesced with concurrent webhooks into one bulk ingest
+        result = await alert_ingest_batcher.submit(generic_alert, organization_id)
         
         return {
             "success": result.success,
@@ -335,7 +332,6 @@ async def aws_cloudwatch_webhook(
 @router.post("/new-relic")
 async def new_relic_webhook(
     request: Request,
-    db: AsyncSession = Depends(get_async_session),
     organization_id: str = Depends(get_organization_from_webhook)
 ):
     """Webhook endpoint for New Relic alerts"""
@@ -374,8 +370,8 @@ async def new_relic_webhook(
             raw_payload=raw_payload
         )
         
-        service = AlertService(db)
-        result = await service.process_alert(generic_alert, organization_id)
+        # Coalesced with concurrent webhooks into one bulk ingest
+        result = await alert_ingest_batcher.submit(generic_alert, organization_id)
         
         return {
             "success": result.success,
@@ -403,7 +399,7 @@ async def prometheus_webhook(
         raw_payload = await request.json()
         logger.info(f"Processing Prometheus webhook for org: {organization_id}")
         
-        results = []
+        generic_alerts = []
         
         # Prometheus sends alerts in a list
         for alert in raw_payload.get("alerts", []):
@@ -437,10 +433,10 @@ async def prometheus_webhook(
                 runbook_url=annotations.get("runbook_url"),
                 raw_payload=alert
             )
-            
-            service = AlertService(db)
-            result = await service.process_alert(generic_alert, organization_id)
-            results.append(result)
+            generic_alerts.append(generic_alert)
+        
+        service = AlertService(db)
+        results = await service.process_alerts_bulk(generic_alerts, organization_id)
         
         return {
             "success": all(r.success for r in results),
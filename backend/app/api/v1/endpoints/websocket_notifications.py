@@ -2,16 +2,20 @@
 from typing import List, Dict, Any
 import json
 import asyncio
+import uuid
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 import jwt
 from app.core.config import settings
 from app.core.security import verify_token
-from app.database import get_async_session
+from app.database import get_async_session, SessionLocal
+from app.models.deployment import Deployment
 from app.models.user import User
 from app.models.incident import Incident
 from app.models.alert import Alert
+from app.services.deployment_service import deployment_service
+from app.services.websocket_service import websocket_manager
 import logging
 
 logger = logging.getLogger(__name__)
@@ -238,6 +242,44 @@ async def websocket_notifications_endpoint(
         except:
             pass
 
+@router.websocket("/ws/deployments/{deployment_id}")
+async def websocket_deployment_endpoint(
+    websocket: WebSocket,
+    deployment_id: str,
+    token: str = Query(..., description="JWT authentication token"),
+    last_event_id: str = Query("$", description="Id of the last event received, to replay missed events"),
+):
+    """WebSocket endpoint streaming a deployment's events from its Redis event stream"""
+    try:
+        user_info = await get_user_from_token(token)
+        
+        try:
+            uuid.UUID(deployment_id)
+        except ValueError:
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        
+        # Only the deployment's own organization may follow it
+        async with SessionLocal() as session:
+            organization_id = await session.scalar(
+                select(Deployment.organization_id).where(Deployment.id == deployment_id)
+            )
+        if organization_id is None or str(organization_id) != user_info["organization_id"]:
+            raise HTTPException(status_code=404, detail="Deployment not found")
+        
+        await websocket_manager.stream_deployment(
+            websocket, deployment_id, deployment_service.redis, last_event_id
+        )
+    
+    except HTTPException as e:
+        logger.warning(f"Deployment WebSocket connection error: {e.status_code}: {e.detail}")
+        await websocket.close(code=1008, reason=e.detail)  # Policy Violation
+    except Exception as e:
+        logger.error(f"Unexpected deployment WebSocket error: {e}")
+        try:
+            await websocket.close(code=1011, reason="Internal server error")
+        except:
+            pass
+
 # Notification service for sending real-time updates
 class NotificationService:
     """Service for sending real-time notifications through WebSocket"""
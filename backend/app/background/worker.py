@@ -2,9 +2,14 @@
 import asyncio
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import SessionLocal
+from app.database import SessionLocal, engine
+from app.models.incident_outbox import INCIDENT_OUTBOX_CHANNEL
+from app.services.alert_service import AlertService, INCIDENT_OUTBOX_BATCH_SIZE
 from app.services.escalation_service import EscalationService
 
+# Fallback poll for outbox entries whose NOTIFY was missed (e.g. while reconnecting)
+INCIDENT_CREATOR_POLL_SECONDS = 30
+
 async def escalation_worker():
     """Background worker that checks for escalations every 5 minutes"""
     print("🚀 Escalation worker started")
@@ -29,10 +34,50 @@ async def escalation_worker():
         # Wait 5 minutes before next check
         await asyncio.sleep(300)
 
+async def incident_creator():
+    """Background worker that creates the incidents queued in the outbox by alert ingestion"""
+    print("🚀 Incident creator started")
+    
+    wakeup = asyncio.Event()
+    
+    while True:
+        try:
+            # Dedicated connection for LISTEN; the outbox insert trigger NOTIFYs on commit
+            async with engine.connect() as listen_connection:
+                raw_connection = await listen_connection.get_raw_connection()
+                driver_connection = raw_connection.driver_connection
+                on_notify = lambda *args: wakeup.set()
+                await driver_connection.add_listener(INCIDENT_OUTBOX_CHANNEL, on_notify)
+                
+                try:
+                    while True:
+                        wakeup.clear()
+                        async with SessionLocal() as db:
+                            alert_service = AlertService(db)
+                            # A full batch means more may be waiting
+                            while await alert_service.create_queued_incidents() == INCIDENT_OUTBOX_BATCH_SIZE:
+                                pass
+                        
+                        try:
+                            await asyncio.wait_for(wakeup.wait(), INCIDENT_CREATOR_POLL_SECONDS)
+                        except asyncio.TimeoutError:
+                            pass
+                finally:
+                    # The connection goes back to the pool; don't leave it LISTENing
+                    if not driver_connection.is_closed():
+                        await driver_connection.remove_listener(INCIDENT_OUTBOX_CHANNEL, on_notify)
+                    
+        except Exception as e:
+            print(f"❌ Incident creator error: {e}")
+            import traceback
+            traceback.print_exc()
+            await asyncio.sleep(INCIDENT_CREATOR_POLL_SECONDS)
+
 async def start_background_workers():
     """Start all background workers"""
     tasks = [
         asyncio.create_task(escalation_worker()),
+        # incident_creator is owned by the API process (started in main.py's lifespan)
         # Add more workers here in future (cleanup, metrics, etc.)
     ]
     
@@ -44,6 +44,14 @@ class Settings(BaseSettings):
     USER_RATE_LIMIT: int = Field(default=100)
     LOGIN_RATE_LIMIT: int = Field(default=5)
     
+    # Password hashing: calibrate the bcrypt cost to this hardware at startup
+    PASSWORD_HASH_CALIBRATE: bool = Field(default=False)
+    PASSWORD_HASH_TARGET_MS: int = Field(default=250)
+    
+    # Deployments: prebuilt runner image (deploy-runner/Dockerfile) kept warm in a container pool
+    DEPLOY_RUNNER_IMAGE: str = Field(default="offcall/deploy-runner:latest")
+    DEPLOY_CONTAINER_POOL_SIZE: int = Field(default=8)
+    
     # Security Features
     ENABLE_MFA: bool = Field(default=True)
     ENABLE_RATE_LIMITING: bool = Field(default=True)
@@ -63,6 +71,7 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = Field(default=None)
     ANTHROPIC_API_KEY: Optional[str] = Field(default=None)
     GEMINI_API_KEY: Optional[str] = Field(default=None)
+    AI_PROVIDER_MAX_CONCURRENCY: int = Field(default=50)  # Concurrent calls per AI provider
     
     # Communication Services
     TWILIO_ACCOUNT_SID: Optional[str] = Field(default=None)
@@ -1,4 +1,8 @@
 # backend/app/core/security.py - Fixed Version
+import math
+import statistics
+import time
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from jose import JWTError, jwt
@@ -12,7 +16,9 @@ from app.database import get_async_session
 from app.models.user import User
 
 # Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_MIN_ROUNDS = 12  # passlib's default; calibration never goes below it
+BCRYPT_MAX_ROUNDS = 16
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_MIN_ROUNDS)
 
 # Security scheme
 security = HTTPBearer(auto_error=False)
@@ -25,6 +31,35 @@ def get_password_hash(password: str) -> str:
     """Hash a password"""
     return pwd_context.hash(password)
 
+@lru_cache(maxsize=1)
+def _dummy_password_hash() -> str:
+    # Built on first use, i.e. after any startup calibration, so it costs what real hashes cost
+    return pwd_context.hash("no-such-user")
+
+def verify_password_for_missing_user(plain_password: str) -> bool:
+    """Spend a real verification's bcrypt work when no user matched, so timing doesn't reveal which emails exist"""
+    pwd_context.verify(plain_password, _dummy_password_hash())
+    return False
+
+def calibrate_password_hashing(target_ms: int, samples: int = 3) -> int:
+    """Set the bcrypt cost whose hash time is closest to target_ms on this machine; returns the rounds.
+
+    Each extra round doubles the work, so one timing at the floor is enough to extrapolate.
+    Existing hashes keep verifying: their cost is stored in the hash itself.
+    """
+    floor_hasher = pwd_context.handler("bcrypt").using(rounds=BCRYPT_MIN_ROUNDS)
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        floor_hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    floor_ms = statistics.median(timings)
+    rounds = BCRYPT_MIN_ROUNDS + round(math.log2(max(target_ms / floor_ms, 1)))
+    rounds = min(rounds, BCRYPT_MAX_ROUNDS)
+    pwd_context.update(bcrypt__rounds=rounds)
+    return rounds
+
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token"""
     to_encode = data.copy()
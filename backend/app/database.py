@@ -1,4 +1,5 @@
 import os
+import orjson
 from sqlalchemy import create_engine
 from sqlalchemy import text
 from sqlalchemy.ext.declarative import declarative_base
@@ -26,7 +27,31 @@ else:
 print(f"🔧 Async URL: {ASYNC_DATABASE_URL[:50]}...")
 
 # SQLAlchemy setup with asyncpg
-engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+# executemany_mode is psycopg2-only; on asyncpg, flushes of many rows are batched as
+# multi-row INSERT ... VALUES ("insertmanyvalues"), 500 rows per statement
+engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    insertmanyvalues_page_size=500,
+    # LIFO reuses the most recently returned (warm) connections, so their prepared statements and
+    # plans get hit again, and lets surplus connections idle out sooner
+    pool_use_lifo=True,
+    pool_pre_ping=True,
+    # Default is 5 + 10 overflow; the incident creator also pins one connection for LISTEN
+    pool_size=10,
+    max_overflow=20,
+    pool_timeout=30,
+    # Recycle before server/proxy idle timeouts cut connections under us
+    pool_recycle=1800,
+    connect_args={
+        # SQLAlchemy's asyncpg adapter cache and asyncpg's own, per connection (default 100 each)
+        "prepared_statement_cache_size": 1024,
+        "statement_cache_size": 1024
+    },
+    # JSON/JSONB columns (alert payloads, labels) go through orjson; asyncpg expects text
+    json_serializer=lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode(),
+    json_deserializer=orjson.loads
+)
 SessionLocal = async_sessionmaker(
     autocommit=False,
     autoflush=False,
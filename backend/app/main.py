@@ -12,7 +12,12 @@ import json
 from typing import Dict
 
 from app.core.config import settings
+from app.core.security import calibrate_password_hashing
 from app.database import get_async_session
+from app.services.alert_ingest_batcher import alert_ingest_batcher
+from app.background.worker import incident_creator
+from app.services.claude_code_service import close_http_session as close_claude_code_session
+from app.services.deployment_service import container_pool, close_docker, deployment_service
 
 # SECURITY: Import security middleware
 try:
@@ -153,6 +158,17 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             print(f"⚠️ OAuth initialization failed: {e}")
     
+    if settings.PASSWORD_HASH_CALIBRATE:
+        rounds = await asyncio.to_thread(calibrate_password_hashing, settings.PASSWORD_HASH_TARGET_MS)
+        print(f"🔐 Password hashing calibrated to bcrypt cost {rounds}")
+    
+    # Warm deploy runners so deployments don't wait on container start
+    try:
+        await container_pool.start()
+        print(f"🐳 Deploy runner pool warmed ({settings.DEPLOY_CONTAINER_POOL_SIZE} containers)")
+    except Exception as e:
+        print(f"⚠️ Deploy runner pool not warmed: {e}")
+    
     print("✅ FastAPI application initialized")
     print("✅ Database connections ready")
     
@@ -183,10 +199,24 @@ async def lifespan(app: FastAPI):
         for feature in features:
             print(f"   {feature}")
     
+    # Outboxed incidents are created here (the only place incident_creator is started);
+    # SKIP LOCKED lets each API process run one
+    incident_creator_task = asyncio.create_task(incident_creator())
+    
     yield
     
     # Shutdown
     print("🛑 OffCall AI shutting down...")
+    await alert_ingest_batcher.close()
+    await close_claude_code_session()
+    await deployment_service.close()
+    await container_pool.close()
+    await close_docker()
+    incident_creator_task.cancel()
+    try:
+        await incident_creator_task
+    except asyncio.CancelledError:
+        pass
 
 # Create FastAPI app with SECURITY HARDENING
 app = FastAPI(
@@ -566,5 +596,6 @@ if __name__ == "__main__":
         host="0.0.0.0", 
         port=8000, 
         reload=True,
+        loop="uvloop",
         log_level="info"
     )
\ No newline at end of file
@@ -12,6 +12,7 @@ from .notification import Notification
 from .oauth_account import OAuthAccount
 from .api_keys import APIKey
 from .deployment import Deployment, DeploymentStep
+from .incident_outbox import IncidentOutbox
 
 __all__ = [
     "Organization",
@@ -27,5 +28,6 @@ __all__ = [
     "OAuthAccount", 
     "APIKey",
     "Deployment",
-    "DeploymentStep"
+    "DeploymentStep",
+    "IncidentOutbox"
 ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 # backend/app/models/alert.py - COMPLETE FIXED VERSION
-from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Enum
+from sqlalchemy import Column, String, Text, DateTime, Boolean, ForeignKey, Enum, Index, LargeBinary, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB, INET
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -32,7 +32,6 @@ class AlertSource(str, enum.Enum):
 
 class Alert(Base):
     __tablename__ = "alerts"
-
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
     incident_id = Column(UUID(as_uuid=True), ForeignKey("incidents.id"), nullable=True)
@@ -63,7 +62,41 @@ class Alert(Base):
     # Metadata
     labels = Column(JSONB, default=dict)
     raw_data = Column(JSONB, default=dict)  # Original payload from monitoring tool
+    raw_data_hash = Column(LargeBinary)  # BLAKE2b-64 of raw_data; skips rewriting unchanged payloads
     
+    __table_args__ = (
+        # Dedup key; alert ingestion UPSERTs against it
+        # INCLUDE lets (id, incident_id, status) dedup reads run as index-only scans
+        Index(
+            "uq_alerts_org_fingerprint",
+            "organization_id",
+            "fingerprint",
+            unique=True,
+            postgresql_include=["id", "incident_id", "status"]
+        ),
+        # Keyset pagination of the alert list: (created_at, id) DESC within an organization
+        Index("ix_alerts_org_created_at_id", "organization_id", created_at.desc(), id.desc()),
+        # Active alerts of an incident (Enum columns store member names, hence 'ACTIVE')
+        Index("ix_alerts_active_by_incident", "incident_id", postgresql_where=text("status = 'ACTIVE'")),
+        # Active alert counts per organization and time window
+        Index(
+            "ix_alerts_active_by_org_created_at",
+            "organization_id",
+            "created_at",
+            postgresql_where=text("status = 'ACTIVE'")
+        ),
+        # Trigram GIN indexes behind list_alerts' ILIKE '%term%' filters (needs pg_trgm)
+        *(
+            Index(
+                f"ix_alerts_{column}_trgm",
+                column,
+                postgresql_using="gin",
+                postgresql_ops={column: "gin_trgm_ops"}
+            )
+            for column in ("service_name", "environment")
+        ),
+    )
+
     # Relationships
     organization = relationship("Organization", back_populates="alerts")
     incident = relationship("Incident", back_populates="alerts")
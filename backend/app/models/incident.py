@@ -1,7 +1,8 @@
 from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum
 from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import func
+from pgvector.sqlalchemy import Vector
 import uuid
 import enum
 from app.database import Base
@@ -47,6 +48,9 @@ class Incident(Base):
     ai_suggested_actions = Column(JSONB)
     ai_confidence_score = Column(Integer)  # 0-100
     
+    # Similarity search - deferred so regular incident loads don't pull 512 floats per row
+    embedding = deferred(Column(Vector(512)))
+    
     # Metadata - renamed to avoid conflict
     tags = Column(JSONB, default=list)
     extra_data = Column(JSONB, default=dict)  # Changed from 'metadata'
@@ -0,0 +1,24 @@
+# backend/app/models/incident_outbox.py - Incidents queued by alert ingestion for the incident creator
+from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+import uuid
+from app.database import Base
+
+# NOTIFY channel raised by the incident_outbox insert trigger
+INCIDENT_OUTBOX_CHANNEL = "incident_outbox"
+
+class IncidentOutbox(Base):
+    __tablename__ = "incident_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=False)
+    alert_id = Column(UUID(as_uuid=True), ForeignKey("alerts.id", ondelete="CASCADE"), nullable=False)
+
+    # Allocated at ingest so the webhook response can already carry it
+    incident_id = Column(UUID(as_uuid=True), nullable=False)
+
+    # GenericAlertPayload fields the incident is built from (raw_payload excluded)
+    payload = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
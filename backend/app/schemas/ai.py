@@ -80,6 +80,7 @@ class ResolutionStep(BaseModel):
     timeout_seconds: int = Field(300, description="Command timeout")
     critical: bool = Field(False, description="Whether step is critical")
     requires_approval: bool = Field(False, description="Whether step needs human approval")
+    use_shell: bool = Field(False, description="Run through /bin/sh (pipes, redirects, &&); otherwise exec'd directly")
 
 class AutoResolutionPlan(BaseModel):
     """Complete automated resolution plan"""
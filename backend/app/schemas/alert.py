@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, List, Union
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 from enum import Enum
 
 class AlertSeverity(str, Enum):
@@ -35,12 +35,12 @@ class AlertProcessingResult(BaseModel):
     incident_updated: bool = False
     alert_fingerprint: str
     
-class AlertResponse(BaseModel):
+class AlertListItem(BaseModel):
+    """Alert as shown in the list; description, labels and raw_data come from the detail endpoint"""
     id: str
     external_id: str
     fingerprint: str
     title: str
-    description: Optional[str] = None
     severity: AlertSeverity
     status: AlertStatus
     source: AlertSource
@@ -52,6 +52,17 @@ class AlertResponse(BaseModel):
     ended_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+    @validator('id', 'incident_id', pre=True)
+    def uuid_to_str(cls, v):
+        """ORM rows carry UUIDs; the API exposes them as strings"""
+        return str(v) if v else None
+
+class AlertResponse(AlertListItem):
+    description: Optional[str] = None
     labels: Optional[Dict[str, Any]] = None
     raw_data: Optional[Dict[str, Any]] = None
 
@@ -82,10 +93,13 @@ class GenericAlertPayload(BaseModel):
     
     # Raw payload for debugging
     raw_payload: Optional[Dict[str, Any]] = Field(default_factory=dict, description="Original webhook payload")
+    
+    # Dedup fingerprint, filled in once by AlertService.generate_alert_fingerprint
+    _fingerprint: Optional[str] = PrivateAttr(default=None)
 
     @validator('severity', pre=True)
     def normalize_severity(cls, v):
-        """Normalize severity from various formats"""
+        """Normalize severity from various formats (AlertService relies on getting an AlertSeverity)"""
         if isinstance(v, str):
             v = v.lower()
             # Handle common variations
@@ -569,7 +583,9 @@ class AlertUpdate(BaseModel):
     labels: Optional[Dict[str, Any]] = None
 
 class AlertListResponse(BaseModel):
-    alerts: List[AlertResponse]
-    total: int
-    page: int
-    per_page: int
\ No newline at end of file
+    alerts: List[AlertListItem]
+    total: Optional[int] = None  # Only computed when requested (include_total)
+    page: int  # Deprecated: page with next_cursor instead
+    per_page: int
+    has_next: bool = False
+    next_cursor: Optional[str] = None
\ No newline at end of file
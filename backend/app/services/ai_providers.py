@@ -4,7 +4,7 @@ import aiohttp
 import json
 import logging
 from typing import Dict, List, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone
 from app.api.v1.endpoints.ai_analysis import AIAnalysisResponse
 
 logger = logging.getLogger(__name__)
@@ -57,7 +57,8 @@ class ClaudeService:
                     content = data["content"][0]["text"]
                     
                     # Parse Claude's response
-                    return self._parse_claude_response(content, incident_context)
+                    analysis_time = datetime.now(timezone.utc).isoformat()
+                    return self._parse_claude_response(content, incident_context, analysis_time)
         
         except Exception as e:
             logger.error(f"Claude analysis failed: {e}")
@@ -96,7 +97,7 @@ Please provide your analysis in the following JSON format:
 Focus on actionable steps and practical solutions. Be specific and prioritize the most impactful actions first.
 """
     
-    def _parse_claude_response(self, content: str, incident_context: Dict[str, Any]) -> AIAnalysisResponse:
+    def _parse_claude_response(self, content: str, incident_context: Dict[str, Any], analysis_time: str) -> AIAnalysisResponse:
         """Parse Claude's response into structured format"""
         
         try:
@@ -113,19 +114,19 @@ Focus on actionable steps and practical solutions. Be specific and prioritize th
                     summary=parsed.get("summary", "Analysis completed"),
                     recommended_actions=parsed.get("recommended_actions", []),
                     confidence_score=parsed.get("confidence_score", 75),
-                    analysis_time=datetime.utcnow().isoformat(),
+                    analysis_time=analysis_time,
                     severity_assessment=parsed.get("severity_assessment"),
                     estimated_resolution_time=parsed.get("estimated_resolution_time"),
                     root_cause_suggestions=parsed.get("root_cause_suggestions", [])
                 )
             else:
                 # Fallback if JSON parsing fails
-                return self._fallback_claude_parsing(content)
+                return self._fallback_claude_parsing(content, analysis_time)
                 
         except json.JSONDecodeError:
-            return self._fallback_claude_parsing(content)
+            return self._fallback_claude_parsing(content, analysis_time)
     
-    def _fallback_claude_parsing(self, content: str) -> AIAnalysisResponse:
+    def _fallback_claude_parsing(self, content: str, analysis_time: str) -> AIAnalysisResponse:
         """Fallback parsing if JSON extraction fails"""
         
         lines = content.strip().split('\n')
@@ -142,7 +143,7 @@ Focus on actionable steps and practical solutions. Be specific and prioritize th
             summary=summary,
             recommended_actions=actions[:5],  # Limit to 5 actions
             confidence_score=70,  # Default confidence
-            analysis_time=datetime.utcnow().isoformat()
+            analysis_time=analysis_time
         )
 
 class GeminiService:
@@ -193,7 +194,8 @@ class GeminiService:
                     content = data["candidates"][0]["content"]["parts"][0]["text"]
                     
                     # Parse Gemini's response
-                    return self._parse_gemini_response(content, incident_context)
+                    analysis_time = datetime.now(timezone.utc).isoformat()
+                    return self._parse_gemini_response(content, incident_context, analysis_time)
         
         except Exception as e:
             logger.error(f"Gemini analysis failed: {e}")
@@ -232,7 +234,7 @@ Please provide your analysis in this exact JSON format:
 Prioritize immediate stabilization actions, then investigation steps. Be specific and actionable.
 """
     
-    def _parse_gemini_response(self, content: str, incident_context: Dict[str, Any]) -> AIAnalysisResponse:
+    def _parse_gemini_response(self, content: str, incident_context: Dict[str, Any], analysis_time: str) -> AIAnalysisResponse:
         """Parse Gemini's response into structured format"""
         
         try:
@@ -249,19 +251,19 @@ Prioritize immediate stabilization actions, then investigation steps. Be specifi
                     summary=parsed.get("summary", "Analysis completed"),
                     recommended_actions=parsed.get("recommended_actions", []),
                     confidence_score=parsed.get("confidence_score", 75),
-                    analysis_time=datetime.utcnow().isoformat(),
+                    analysis_time=analysis_time,
                     severity_assessment=parsed.get("severity_assessment"),
                     estimated_resolution_time=parsed.get("estimated_resolution_time"),
                     root_cause_suggestions=parsed.get("root_cause_suggestions", [])
                 )
             else:
                 # Fallback if JSON parsing fails
-                return self._fallback_gemini_parsing(content)
+                return self._fallback_gemini_parsing(content, analysis_time)
                 
         except json.JSONDecodeError:
-            return self._fallback_gemini_parsing(content)
+            return self._fallback_gemini_parsing(content, analysis_time)
     
-    def _fallback_gemini_parsing(self, content: str) -> AIAnalysisResponse:
+    def _fallback_gemini_parsing(self, content: str, analysis_time: str) -> AIAnalysisResponse:
         """Fallback parsing if JSON extraction fails"""
         
         lines = content.strip().split('\n')
@@ -278,5 +280,5 @@ Prioritize immediate stabilization actions, then investigation steps. Be specifi
             summary=summary,
             recommended_actions=actions[:5],  # Limit to 5 actions
             confidence_score=70,  # Default confidence
-            analysis_time=datetime.utcnow().isoformat()
+            analysis_time=analysis_time
         )
\ No newline at end of file
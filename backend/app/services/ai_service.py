@@ -3,9 +3,11 @@ import asyncio
 import time
 import json
 import logging
+import re
 from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import aiohttp
+from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from cachetools import TTLCache
 import uuid
@@ -16,6 +18,15 @@ from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Shared across requests: the service is instantiated per request, so per-instance
+# state would never see a repeat. Keys always include the organization.
+_analysis_cache = TTLCache(maxsize=1000, ttl=300)  # 5-minute cache
+_inflight_analyses: Dict[str, asyncio.Future] = {}
+
+# Rule-based severity tiers, one compiled scan per tier
+_HIGH_SEVERITY_RE = re.compile("critical|down|failed|crash")
+_MEDIUM_SEVERITY_RE = re.compile("warning|slow|degraded")
+
 class EnhancedAIService:
     """
     Multi-AI provider service with Kubernetes-level efficiency
@@ -24,7 +35,7 @@ class EnhancedAIService:
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.response_cache = TTLCache(maxsize=1000, ttl=300)  # 5-minute cache
+        self.response_cache = _analysis_cache
         self.provider_stats = {}
         
     async def analyze_incident(
@@ -42,19 +53,73 @@ class EnhancedAIService:
         
         start_time = time.time()
         
+        # Check cache first for speed
+        cache_key = f"analysis_{organization_id}_{incident_id}_{include_historical}_{include_recommendations}_{force_provider}"
+        if cache_key in self.response_cache:
+            # Copy: cached responses are shared between requests
+            return self.response_cache[cache_key].model_copy(update={
+                "processing_time": time.time() - start_time,
+                "cache_hit": True
+            })
+        
+        # Single-flight: alert storms fire identical analyses; share the first caller's result
+        inflight = _inflight_analyses.get(cache_key)
+        if inflight is not None:
+            try:
+                shared_result = await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise  # This request was cancelled itself
+                # The first caller was cancelled before finishing; analyze on our own
+                return await self.analyze_incident(
+                    incident_id, organization_id, include_historical, include_recommendations, force_provider
+                )
+            return shared_result.model_copy(update={
+                "processing_time": time.time() - start_time,
+                "cache_hit": True
+            })
+        
+        future = asyncio.get_running_loop().create_future()
+        _inflight_analyses[cache_key] = future
+        try:
+            response = await self._run_analysis(
+                incident_id, organization_id, include_historical, cache_key, start_time
+            )
+        except asyncio.CancelledError:
+            # Waiters retry on their own rather than fail with this caller's cancellation
+            future.cancel()
+            raise
+        except BaseException as e:
+            # Waiters get the real error; retrieved here so it isn't logged when nobody waited
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(response)
+            return response
+        finally:
+            _inflight_analyses.pop(cache_key, None)
+    
+    async def _run_analysis(
+        self,
+        incident_id: str,
+        organization_id: str,
+        include_historical: bool,
+        cache_key: str,
+        start_time: float
+    ) -> AIAnalysisResponse:
+        """Uncached analysis body behind analyze_incident's cache and single-flight"""
+        
         try:
             # Get incident with context
             incident = await self._get_incident_with_context(incident_id, organization_id)
             if not incident:
                 raise ValueError("Incident not found")
             
-            # Check cache first for speed
-            cache_key = f"analysis_{incident_id}_{include_historical}_{include_recommendations}_{force_provider}"
-            if cache_key in self.response_cache:
-                cached_result = self.response_cache[cache_key]
-                cached_result.processing_time = time.time() - start_time
-                cached_result.cache_hit = True
-                return cached_result
+            # Historical context: one aggregate query, shared by every consumer below
+            similar_count, avg_resolution_minutes = 0, None
+            if include_historical:
+                similar_count, avg_resolution_minutes = await self._similar_incidents_summary(incident)
             
             # Parallel AI analysis for speed
             analysis_tasks = [
@@ -90,7 +155,7 @@ class EnhancedAIService:
             
             # Fallback if no good results
             if not best_analysis:
-                best_analysis = await self._rule_based_analysis(incident)
+                best_analysis = await self._rule_based_analysis(incident, avg_resolution_minutes)
             
             # Convert to response format
             insights = IncidentInsights(
@@ -109,7 +174,7 @@ class EnhancedAIService:
                 severity_prediction=IncidentSeverity(best_analysis.get("predicted_severity", "MEDIUM")),
                 confidence_score=best_analysis.get("confidence_score", 0.8),
                 insights=insights,
-                similar_incidents_count=0,
+                similar_incidents_count=similar_count,
                 estimated_resolution_time=best_analysis.get("estimated_resolution_minutes", 30),
                 impact_assessment=best_analysis.get("impact_assessment", "Medium"),
                 recommended_actions=best_analysis.get("recommended_actions", []),
@@ -364,13 +429,40 @@ class EnhancedAIService:
                 description="Pod failing with missing sendgrid dependency",
                 severity="HIGH",
                 status="OPEN",
-                created_at=datetime.utcnow(),
+                created_at=datetime.now(timezone.utc),
                 tags=["kubernetes", "crashloop", "dependency"]
             )
         except Exception as e:
             logger.error(f"Failed to get incident {incident_id}: {e}")
             return None
     
+    async def _similar_incidents_summary(self, incident: Incident) -> Tuple[int, Optional[float]]:
+        """Count resolved incidents of the same severity and their mean resolution time in minutes, computed in SQL"""
+        try:
+            organization_id = uuid.UUID(str(incident.organization_id))
+        except ValueError:
+            # Demo/benchmark organizations have no history
+            return 0, None
+        
+        try:
+            resolution_minutes = func.extract('epoch', Incident.resolved_at - Incident.created_at) / 60
+            query = select(
+                func.count(Incident.id),
+                func.avg(resolution_minutes)
+            ).where(
+                Incident.organization_id == organization_id,
+                Incident.severity == incident.severity,
+                Incident.resolved_at.isnot(None),
+                Incident.id != incident.id
+            )
+            
+            result = await self.db.execute(query)
+            count, avg_minutes = result.one()
+            return count, float(avg_minutes) if avg_minutes is not None else None
+        except Exception as e:
+            logger.warning(f"Similar incident summary failed: {e}")
+            return 0, None
+    
     async def _analyze_with_claude_code(self, incident: Incident) -> Dict[str, Any]:
         """Analyze incident using Claude Code"""
         try:
@@ -449,14 +541,14 @@ class EnhancedAIService:
             logger.warning(f"OpenAI analysis failed: {e}")
             return None
     
-    async def _rule_based_analysis(self, incident: Incident) -> Dict[str, Any]:
+    async def _rule_based_analysis(self, incident: Incident, avg_resolution_minutes: Optional[float] = None) -> Dict[str, Any]:
         """Fallback rule-based analysis when AI providers fail"""
         description_lower = incident.description.lower()
         
         severity = "MEDIUM"
-        if any(word in description_lower for word in ["critical", "down", "failed", "crash"]):
+        if _HIGH_SEVERITY_RE.search(description_lower):
             severity = "HIGH"
-        elif any(word in description_lower for word in ["warning", "slow", "degraded"]):
+        elif _MEDIUM_SEVERITY_RE.search(description_lower):
             severity = "MEDIUM"
         
         return {
@@ -473,7 +565,7 @@ class EnhancedAIService:
                 "Contact on-call engineer"
             ],
             "auto_resolvable": False,
-            "estimated_resolution_minutes": 45,
+            "estimated_resolution_minutes": round(avg_resolution_minutes) if avg_resolution_minutes else 45,
             "prevention_suggestions": ["Implement better monitoring"],
             "correlation_score": 0.5
         }
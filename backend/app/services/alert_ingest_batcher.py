@@ -0,0 +1,114 @@
+# backend/app/services/alert_ingest_batcher.py - Coalesce single-alert webhooks into bulk ingests
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.database import SessionLocal
+from app.schemas.alert import GenericAlertPayload, AlertProcessingResult
+from app.services.alert_service import AlertService
+
+logger = logging.getLogger(__name__)
+
+BATCH_MAX_SIZE = 50
+BATCH_MAX_WAIT_SECONDS = 0.02
+
+_PendingAlert = Tuple[str, GenericAlertPayload, asyncio.Future]
+
+
+class AlertIngestBatcher:
+    """Collects alerts from concurrent webhook requests for a few ms and ingests them per org in bulk"""
+
+    def __init__(self, max_batch_size: int = BATCH_MAX_SIZE, max_wait_seconds: float = BATCH_MAX_WAIT_SECONDS):
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._drain_task: Optional[asyncio.Task] = None
+        self._ingest_tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, alert_data: GenericAlertPayload, organization_id: str) -> AlertProcessingResult:
+        """Queue an alert and wait for the result of the batch it lands in"""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((organization_id, alert_data, future))
+        return await future
+
+    def _ensure_started(self) -> None:
+        if self._drain_task is None or self._drain_task.done():
+            self._queue = asyncio.Queue()
+            self._drain_task = asyncio.create_task(self._drain_loop())
+
+    async def _drain_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            # Block for the first alert, then take whatever else arrives before the deadline
+            batch: List[_PendingAlert] = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait_seconds
+            try:
+                while len(batch) < self.max_batch_size:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+            except asyncio.CancelledError:
+                # Shutting down mid-collection: release the submitters already dequeued
+                for _, _, future in batch:
+                    future.cancel()
+                raise
+
+            # Ingest in the background so the next batch can start collecting (and run) meanwhile
+            task = asyncio.create_task(self._ingest_batch(batch))
+            self._ingest_tasks.add(task)
+            task.add_done_callback(self._ingest_tasks.discard)
+
+    async def _ingest_batch(self, batch: List[_PendingAlert]) -> None:
+        try:
+            await self._ingest(batch)
+        except Exception as e:
+            logger.error(f"Alert batch ingest failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    async def _ingest(self, batch: List[_PendingAlert]) -> None:
+        # Group by organization, keeping arrival order within each org
+        by_org: Dict[str, List[_PendingAlert]] = {}
+        for pending in batch:
+            by_org.setdefault(pending[0], []).append(pending)
+
+        async with SessionLocal() as db:
+            service = AlertService(db)
+            for organization_id, pending_alerts in by_org.items():
+                payloads = [alert_data for _, alert_data, _ in pending_alerts]
+                if len(payloads) == 1:
+                    results = [await service.process_alert(payloads[0], organization_id)]
+                else:
+                    results = await service.process_alerts_bulk(payloads, organization_id)
+
+                for (_, _, future), result in zip(pending_alerts, results):
+                    # The submitting request may have gone away
+                    if not future.done():
+                        future.set_result(result)
+
+        logger.info(f"Ingested batch of {len(batch)} alerts for {len(by_org)} organizations")
+
+    async def close(self) -> None:
+        """Stop the drain loop, finish batches already being ingested, cancel alerts still queued"""
+        if self._drain_task and not self._drain_task.done():
+            self._drain_task.cancel()
+            try:
+                await self._drain_task
+            except asyncio.CancelledError:
+                pass
+        if self._ingest_tasks:
+            await asyncio.gather(*self._ingest_tasks, return_exceptions=True)
+        if self._queue:
+            while not self._queue.empty():
+                _, _, future = self._queue.get_nowait()
+                future.cancel()
+
+
+# Shared by all webhook requests in this process
+alert_ingest_batcher = AlertIngestBatcher()
@@ -1,41 +1,187 @@
+import asyncio
+import base64
 import hashlib
-import json
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+import orjson
+from cachetools import TTLCache
+from functools import lru_cache
+from types import MappingProxyType
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List, Set, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, func, desc
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, update, delete, lambda_stmt, tuple_, and_, func, desc, exists, case, cast, literal_column, text, Text
+from sqlalchemy.dialects.postgresql import insert as pg_insert, JSONB
+from sqlalchemy.orm import selectinload, aliased, raiseload
+from sqlalchemy.exc import SQLAlchemyError
 import uuid
+from app.database import SessionLocal
 from app.models.alert import Alert
 from app.models.incident import Incident
+from app.models.incident_outbox import IncidentOutbox
 from app.models.organization import Organization
 from app.schemas.alert import (
-    GenericAlertPayload, AlertProcessingResult, AlertStatus, AlertSeverity,
-    AlertResponse, AlertCreate, AlertUpdate, AlertListResponse
+    GenericAlertPayload, AlertProcessingResult, AlertStatus, AlertSeverity, AlertSource,
+    AlertResponse, AlertCreate, AlertUpdate, AlertListItem, AlertListResponse
 )
 from app.schemas.incident import IncidentCreate, IncidentSeverity, IncidentStatus, IncidentUpdate
+from app.services.incident_service import embed_new_incidents
 from app.services.notification_service import NotificationService
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Alert severity -> incident severity
+SEVERITY_MAP = MappingProxyType({
+    AlertSeverity.INFO: "low",
+    AlertSeverity.WARNING: "medium",
+    AlertSeverity.ERROR: "high",
+    AlertSeverity.HIGH: "high",
+    AlertSeverity.CRITICAL: "critical"
+})
+
+# Incident-creation policy constants
+ERROR_SEVERITIES = frozenset({AlertSeverity.ERROR, AlertSeverity.HIGH})
+DEFAULT_INCIDENT_SEVERITIES = frozenset({AlertSeverity.WARNING, AlertSeverity.ERROR})
+PRODUCTION_ENVIRONMENTS = frozenset({"prod", "production", "live"})
+STRICT_PRODUCTION_ENVIRONMENTS = frozenset({"prod", "production"})
+CRITICAL_SERVICES = ("payment", "auth", "database", "api-gateway")
+
+INCIDENT_TITLE_MAX_LENGTH = Incident.__table__.c.title.type.length
+
+# Payload-only incident rules keyed on (severity, environment class), where the class is
+# "prod" (prod/production), "live" or None. Missing keys need the flapping/maintenance checks.
+_CRITICAL_SERVICE_ONLY = object()
+_STATIC_INCIDENT_DECISIONS = MappingProxyType({
+    # Always create incident for critical alerts
+    **{(AlertSeverity.CRITICAL, env_class): True for env_class in ("prod", "live", None)},
+    # Create incident for error severity in production
+    **{(severity, env_class): True for severity in ERROR_SEVERITIES for env_class in ("prod", "live")},
+    # Don't create incidents for info alerts unless in production (and then only critical services)
+    (AlertSeverity.INFO, "prod"): _CRITICAL_SERVICE_ONLY,
+    (AlertSeverity.INFO, "live"): False,
+    (AlertSeverity.INFO, None): False,
+})
+
+
+@lru_cache(maxsize=4096)
+def _fingerprint(alert_id: str, title: str, service: str, source: str, environment: str) -> str:
+    """Dedup fingerprint; memoized because webhook retries and flapping resend identical alerts"""
+    # NUL-delimited (no field can contain NUL, so the encoding is unambiguous)
+    fingerprint_bytes = "\0".join((alert_id, title, service, source, environment)).encode()
+    
+    # 128-bit digest keeps the 32-char hex width of the previous MD5 fingerprints
+    return hashlib.blake2b(fingerprint_bytes, digest_size=16).hexdigest()
+
+
+def _raw_data_hash(raw_data: Dict[str, Any]) -> bytes:
+    """Digest of a raw payload; key order is canonicalized so identical retries hash equal"""
+    return hashlib.blake2b(_dump_raw_data(raw_data), digest_size=8).digest()
+
+
+def _dump_raw_data(raw_data: Dict[str, Any]) -> bytes:
+    """Canonical JSON for a raw payload (JSONB discards key order, so sorting loses nothing)"""
+    return orjson.dumps(raw_data, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+
+
+def _encode_list_cursor(created_at: datetime, alert_id: uuid.UUID) -> str:
+    """Opaque list_alerts cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{alert_id}".encode()).decode()
+
+
+def _decode_list_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        created_at, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(alert_id)
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+# Flapping verdicts per (org, window, threshold, fingerprint); alert storms re-ask within seconds
+_flapping_cache = TTLCache(maxsize=10000, ttl=60)
+
+# Columns behind AlertListItem; the list never reads description, labels or the (large) raw_data
+_ALERT_LIST_COLUMNS = tuple(getattr(Alert, field) for field in AlertListItem.model_fields)
+
+# Dashboard statistics per (organization_id, days); a minute of staleness is fine for the dashboard
+_statistics_cache = TTLCache(maxsize=1024, ttl=60)
+
+# GROUPING(severity, source, service_name) values in get_alert_statistics
+_GROUPED_BY_NOTHING = 0b111
+_GROUPED_BY_SEVERITY = 0b011
+_GROUPED_BY_SOURCE = 0b101
+
+# Whether the alert's incident has another active alert; EXISTS stops at the first match
+# (one probe of ix_alerts_active_by_incident)
+_sibling_alert = aliased(Alert)
+_HAS_OTHER_ACTIVE = exists().where(
+    and_(
+        _sibling_alert.incident_id == Alert.incident_id,
+        _sibling_alert.organization_id == Alert.organization_id,
+        _sibling_alert.status == AlertStatus.ACTIVE,
+        _sibling_alert.id != Alert.id
+    )
+).correlate(Alert)
+
+# Payload fields _alert_to_incident reads; queued with the outbox entry for the incident creator
+_INCIDENT_PAYLOAD_FIELDS = frozenset({
+    "alert_id", "title", "description", "severity", "source", "service", "environment",
+    "region", "host", "tags", "alert_url", "runbook_url", "dashboard_url"
+})
+
+# Outbox entries the incident creator claims per transaction
+INCIDENT_OUTBOX_BATCH_SIZE = 100
+
+
+def _payload_from_outbox(payload: Dict[str, Any]) -> GenericAlertPayload:
+    """Rebuild the queued payload without re-validating (that would re-normalize high -> error)"""
+    return GenericAlertPayload.model_construct(**{
+        **payload,
+        "severity": AlertSeverity(payload["severity"]),
+        "source": AlertSource(payload["source"])
+    })
+
+
+# In-flight fire-and-forget notification tasks (services are per-request, so this is module-level)
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _notify_incident_created(incident_id: str) -> None:
+    """Notify for a newly created incident in its own session (the request session is gone by then)"""
+    try:
+        async with SessionLocal() as db:
+            incident = await db.get(Incident, uuid.UUID(incident_id))
+            if incident:
+                await NotificationService(db).notify_incident_created(incident)
+    except Exception as e:
+        logger.error(f"Failed to send notifications for incident {incident_id}: {e}")
+
+
 class AlertService:
     def __init__(self, db: AsyncSession):
         self.db = db
 
     def generate_alert_fingerprint(self, alert_data: GenericAlertPayload) -> str:
         """Generate a unique fingerprint for alert deduplication"""
-        # Use alert_id, title, service, and source to create fingerprint
-        fingerprint_data = {
-            "alert_id": alert_data.alert_id,
-            "title": alert_data.title,
-            "service": alert_data.service or "unknown",
-            "source": alert_data.source.value if hasattr(alert_data.source, 'value') else str(alert_data.source),
-            "environment": alert_data.environment or "unknown"
-        }
-        
-        fingerprint_string = json.dumps(fingerprint_data, sort_keys=True)
-        return hashlib.md5(fingerprint_string.encode()).hexdigest()
+        # Computed once per payload; ingest, flapping and batch paths all ask for it
+        if alert_data._fingerprint is None:
+            alert_data._fingerprint = self._fingerprint_fields(
+                alert_data.alert_id,
+                alert_data.title,
+                alert_data.service,
+                alert_data.source,
+                alert_data.environment
+            )
+        return alert_data._fingerprint
+
+    @staticmethod
+    def _fingerprint_fields(
+        alert_id: str,
+        title: str,
+        service: Optional[str],
+        source: AlertSource,
+        environment: Optional[str]
+    ) -> str:
+        """Fingerprint from the identifying fields, for callers that don't hold a GenericAlertPayload"""
+        return _fingerprint(alert_id, title, service or "unknown", source.value, environment or "unknown")
 
     async def get_alert_by_fingerprint(
         self, 
@@ -43,13 +189,14 @@ class AlertService:
         organization_id: str
     ) -> Optional[Alert]:
         """Find existing alert by fingerprint"""
+        # lambda_stmt caches the constructed statement; only the bound values change per call
         result = await self.db.execute(
-            select(Alert).where(
+            lambda_stmt(lambda: select(Alert).options(raiseload('*')).where(
                 and_(
                     Alert.fingerprint == fingerprint,
                     Alert.organization_id == organization_id
                 )
-            )
+            ))
         )
         return result.scalar_one_or_none()
 
@@ -60,12 +207,12 @@ class AlertService:
     ) -> Optional[Alert]:
         """Get alert by ID with organization check"""
         result = await self.db.execute(
-            select(Alert).where(
+            lambda_stmt(lambda: select(Alert).options(raiseload('*')).where(
                 and_(
                     Alert.id == alert_id,
                     Alert.organization_id == organization_id
                 )
-            )
+            ))
         )
         return result.scalar_one_or_none()
 
@@ -78,76 +225,60 @@ class AlertService:
         environment: Optional[str] = None,
         source: Optional[str] = None,
         page: int = 1,
-        per_page: int = 20
+        per_page: int = 20,
+        cursor: Optional[str] = None,
+        include_total: bool = False
     ) -> AlertListResponse:
-        """List alerts with filtering and pagination"""
+        """List alerts with filtering and keyset pagination (`page` is deprecated; pass `cursor`)"""
         
-        query = select(Alert).where(Alert.organization_id == organization_id)
-        
-        # Apply filters
+        # Filters shared by the page query and the optional count
+        conditions = [Alert.organization_id == organization_id]
         if status:
-            query = query.where(Alert.status == status)
+            conditions.append(Alert.status == status)
         if severity:
-            query = query.where(Alert.severity == severity)
+            conditions.append(Alert.severity == severity)
         if service:
-            query = query.where(Alert.service_name.ilike(f"%{service}%"))
+            conditions.append(Alert.service_name.ilike(f"%{service}%"))
         if environment:
-            query = query.where(Alert.environment.ilike(f"%{environment}%"))
+            conditions.append(Alert.environment.ilike(f"%{environment}%"))
         if source:
-            query = query.where(Alert.source == source)
+            conditions.append(Alert.source == source)
         
-        # Count total
-        count_query = select(func.count(Alert.id)).where(Alert.organization_id == organization_id)
-        if status:
-            count_query = count_query.where(Alert.status == status)
-        if severity:
-            count_query = count_query.where(Alert.severity == severity)
-        if service:
-            count_query = count_query.where(Alert.service_name.ilike(f"%{service}%"))
-        if environment:
-            count_query = count_query.where(Alert.environment.ilike(f"%{environment}%"))
-        if source:
-            count_query = count_query.where(Alert.source == source)
+        # Plain column rows: no ORM identity-map work and no JSONB parsing for columns the list drops
+        query = select(*_ALERT_LIST_COLUMNS).where(and_(*conditions))
         
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar()
+        # Exact total only on request; paging itself just needs has_next
+        total = None
+        if include_total:
+            total_result = await self.db.execute(
+                select(func.count()).select_from(Alert).where(and_(*conditions))
+            )
+            total = total_result.scalar()
         
-        # Apply pagination and ordering
-        offset = (page - 1) * per_page
-        query = query.order_by(desc(Alert.created_at)).offset(offset).limit(per_page)
+        # Keyset pagination: seek past the cursor on (created_at, id) instead of scanning an OFFSET
+        if cursor:
+            cursor_created_at, cursor_id = _decode_list_cursor(cursor)
+            query = query.where(tuple_(Alert.created_at, Alert.id) < tuple_(cursor_created_at, cursor_id))
+        elif page > 1:
+            # Deprecated offset paging, kept for existing clients
+            query = query.offset((page - 1) * per_page)
+        # One extra row tells us whether another page exists
+        query = query.order_by(desc(Alert.created_at), desc(Alert.id)).limit(per_page + 1)
         
         result = await self.db.execute(query)
-        alerts = result.scalars().all()
-        
-        # Convert to response format
-        alert_responses = []
-        for alert in alerts:
-            alert_responses.append(AlertResponse(
-                id=str(alert.id),
-                external_id=alert.external_id,
-                fingerprint=alert.fingerprint,
-                title=alert.title,
-                description=alert.description,
-                severity=alert.severity,
-                status=alert.status,
-                source=alert.source,
-                service_name=alert.service_name,
-                environment=alert.environment,
-                host=alert.host,
-                incident_id=str(alert.incident_id) if alert.incident_id else None,
-                started_at=alert.started_at,
-                ended_at=alert.ended_at,
-                created_at=alert.created_at,
-                updated_at=alert.updated_at,
-                labels=alert.labels,
-                raw_data=alert.raw_data
-            ))
+        alerts = result.all()
+        has_next = len(alerts) > per_page
+        alerts = alerts[:per_page]
+        next_cursor = _encode_list_cursor(alerts[-1].created_at, alerts[-1].id) if has_next else None
         
-        return AlertListResponse(
-            alerts=alert_responses,
+        # Convert to response format; the items are validated, so the envelope skips re-validation
+        return AlertListResponse.model_construct(
+            alerts=[AlertListItem.model_validate(alert) for alert in alerts],
             total=total,
             page=page,
-            per_page=per_page
+            per_page=per_page,
+            has_next=has_next,
+            next_cursor=next_cursor
         )
 
     async def process_alert(
@@ -157,22 +288,17 @@ class AlertService:
     ) -> AlertProcessingResult:
         """Process incoming alert and create/update incidents intelligently"""
         
+        # Outside the try so the error result reports the same fingerprint without rehashing
+        fingerprint = self.generate_alert_fingerprint(alert_data)
+        
         try:
             logger.info(f"Processing alert {alert_data.alert_id} for org {organization_id}")
             
-            fingerprint = self.generate_alert_fingerprint(alert_data)
-            
-            # Check if we've seen this alert before
-            existing_alert = await self.get_alert_by_fingerprint(fingerprint, organization_id)
-            
             if alert_data.status == AlertStatus.RESOLVED:
-                return await self._handle_resolved_alert(
-                    alert_data, existing_alert, fingerprint, organization_id
-                )
+                return await self._handle_resolved_alert(alert_data, fingerprint, organization_id)
             else:
-                return await self._handle_active_alert(
-                    alert_data, existing_alert, fingerprint, organization_id
-                )
+                # UPSERT dedups against existing alerts in the same round-trip
+                return await self._handle_active_alert(alert_data, fingerprint, organization_id)
                 
         except Exception as e:
             logger.error(f"Error processing alert {alert_data.alert_id}: {e}")
@@ -180,44 +306,157 @@ class AlertService:
             return AlertProcessingResult(
                 success=False,
                 message=f"Error processing alert: {str(e)}",
-                alert_fingerprint=self.generate_alert_fingerprint(alert_data)
+                alert_fingerprint=fingerprint
             )
 
-    async def _handle_active_alert(
+    async def process_alerts_bulk(
         self,
-        alert_data: GenericAlertPayload,
-        existing_alert: Optional[Alert],
-        fingerprint: str,
+        payloads: List[GenericAlertPayload],
         organization_id: str
-    ) -> AlertProcessingResult:
-        """Handle an active/triggered alert - FIXED VERSION"""
+    ) -> List[AlertProcessingResult]:
+        """Process a multi-alert webhook: one dedup query, COPY for brand-new active alerts"""
         
-        if existing_alert:
-            # Update existing alert
-            existing_alert.status = AlertStatus.ACTIVE
-            existing_alert.raw_data = alert_data.raw_payload or {}
-            existing_alert.updated_at = datetime.utcnow()
+        # COPY ships literal values, so this path stamps new alerts client-side
+        now = datetime.now(timezone.utc)
+        fingerprints = [self.generate_alert_fingerprint(payload) for payload in payloads]
+        results: List[Optional[AlertProcessingResult]] = [None] * len(payloads)
+        
+        try:
+            unique_fingerprints = list(set(fingerprints))
+            existing_result = await self.db.execute(
+                lambda_stmt(lambda: select(Alert.fingerprint).where(
+                    and_(
+                        Alert.organization_id == organization_id,
+                        Alert.fingerprint.in_(unique_fingerprints)
+                    )
+                ))
+            )
+            known_fingerprints = set(existing_result.scalars().all())
+            
+            # Bulk-insert a fingerprint only when its first occurrence in the batch is a new
+            # active alert; every later occurrence goes through process_alert in order, which
+            # keeps per-fingerprint semantics identical to sequential processing
+            new_indexes = []
+            for index, (payload, fingerprint) in enumerate(zip(payloads, fingerprints)):
+                if fingerprint in known_fingerprints:
+                    continue
+                known_fingerprints.add(fingerprint)
+                if payload.status != AlertStatus.RESOLVED:
+                    new_indexes.append(index)
             
-            if alert_data.raw_payload:
-                existing_alert.labels = existing_alert.labels or {}
-                existing_alert.labels.update({
-                    "last_updated": datetime.utcnow().isoformat(),
-                    "update_count": existing_alert.labels.get("update_count", 0) + 1
-                })
+            if new_indexes:
+                await self._copy_new_alerts(
+                    [(payloads[i], fingerprints[i]) for i in new_indexes],
+                    organization_id,
+                    results,
+                    new_indexes,
+                    now
+                )
+        except Exception as e:
+            logger.error(f"Bulk alert insert failed, falling back to per-alert processing: {e}")
+            await self.db.rollback()
+            results = [None] * len(payloads)
+        
+        for index, payload in enumerate(payloads):
+            if results[index] is None:
+                results[index] = await self.process_alert(payload, organization_id)
+        
+        return results
 
-            await self.db.commit()
+    async def _copy_new_alerts(
+        self,
+        new_alerts: List[Tuple[GenericAlertPayload, str]],
+        organization_id: str,
+        results: List[Optional[AlertProcessingResult]],
+        result_indexes: List[int],
+        now: datetime
+    ) -> None:
+        """Insert unseen active alerts (and queue their incidents) with a single COPY and one commit"""
+        
+        org_uuid = uuid.UUID(str(organization_id))
+        records = []
+        outbox_entries = []
+        pending_results = []
+        
+        create_incident = await self._should_create_incident_batch(
+            [alert_data for alert_data, _ in new_alerts], organization_id
+        )
+        
+        for (alert_data, fingerprint), should_create_incident in zip(new_alerts, create_incident):
+            alert_id = uuid.uuid4()
+            incident_id = None
+            if should_create_incident:
+                incident_id = str(uuid.uuid4())
+                outbox_entries.append(self._incident_outbox_entry(alert_data, organization_id, alert_id, incident_id))
             
-            return AlertProcessingResult(
+            source = alert_data.source.value
+            raw_data = _dump_raw_data(alert_data.raw_payload or {})
+            records.append((
+                alert_id,
+                org_uuid,
+                None,  # Linked by the incident creator
+                alert_data.alert_id,
+                fingerprint,
+                alert_data.title,
+                alert_data.description,
+                AlertSeverity(alert_data.severity).name,  # Enum columns store member names
+                AlertStatus.ACTIVE.name,
+                source,
+                alert_data.service,
+                alert_data.environment,
+                alert_data.region or alert_data.host,
+                alert_data.started_at or now,
+                raw_data.decode(),  # asyncpg's jsonb codec takes text
+                hashlib.blake2b(raw_data, digest_size=8).digest(),
+                orjson.dumps({
+                    "tags": alert_data.tags or [],
+                    "alert_url": alert_data.alert_url,
+                    "runbook_url": alert_data.runbook_url,
+                    "dashboard_url": alert_data.dashboard_url
+                }).decode()
+            ))
+            pending_results.append(AlertProcessingResult(
                 success=True,
-                incident_id=str(existing_alert.incident_id) if existing_alert.incident_id else None,
-                incident_created=False,
-                incident_updated=True,
-                message="Alert updated, incident already exists",
+                incident_id=incident_id,
+                incident_created=incident_id is not None,
+                incident_updated=False,
+                message="New alert processed" + (" and incident queued" if incident_id else ""),
                 alert_fingerprint=fingerprint
-            )
+            ))
+        
+        # COPY shares the session's transaction
+        connection = await self.db.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "alerts",
+            records=records,
+            columns=[
+                "id", "organization_id", "incident_id", "external_id", "fingerprint",
+                "title", "description", "severity", "status", "source",
+                "service_name", "environment", "host", "started_at", "raw_data", "raw_data_hash", "labels"
+            ]
+        )
+        # Outbox rows reference the copied alerts, so they go in after the COPY (flushed by the commit)
+        self.db.add_all(outbox_entries)
+        await self.db.commit()
+        
+        for index, result in zip(result_indexes, pending_results):
+            results[index] = result
+        logger.info(f"Bulk-inserted {len(records)} alerts for org {organization_id}")
+
+    async def _handle_active_alert(
+        self,
+        alert_data: GenericAlertPayload,
+        fingerprint: str,
+        organization_id: str
+    ) -> AlertProcessingResult:
+        """Handle an active/triggered alert with a single atomic UPSERT on (organization_id, fingerprint)"""
+        
+        source = alert_data.source.value
+        raw_data = alert_data.raw_payload or {}
         
-        # Create new alert
-        new_alert = Alert(
+        stmt = pg_insert(Alert).values(
+            id=uuid.uuid4(),
             organization_id=organization_id,
             external_id=alert_data.alert_id,
             fingerprint=fingerprint,
@@ -225,12 +464,14 @@ class AlertService:
             description=alert_data.description,
             severity=alert_data.severity,
             status=AlertStatus.ACTIVE,
-            source=alert_data.source,
+            source=source,
             service_name=alert_data.service,
             environment=alert_data.environment,
             host=alert_data.region or alert_data.host,
-            started_at=alert_data.started_at or datetime.utcnow(),
-            raw_data=alert_data.raw_payload or {},
+            # Timestamps come from the database clock (one now() per transaction), not each pod's
+            started_at=alert_data.started_at or func.now(),
+            raw_data=raw_data,
+            raw_data_hash=_raw_data_hash(raw_data),
             labels={
                 "tags": alert_data.tags or [],
                 "alert_url": alert_data.alert_url,
@@ -239,8 +480,48 @@ class AlertService:
             }
         )
         
-        self.db.add(new_alert)
-        await self.db.flush()  # Get the alert ID
+        # Re-fired alert: reactivate it and refresh the payload on the existing row. Retries usually
+        # resend the same payload; keeping the stored value then avoids rewriting (and re-TOASTing) it.
+        payload_unchanged = Alert.raw_data_hash == stmt.excluded.raw_data_hash
+        update_values = {
+            "status": AlertStatus.ACTIVE,
+            "raw_data": case((payload_unchanged, Alert.raw_data), else_=stmt.excluded.raw_data),
+            "raw_data_hash": stmt.excluded.raw_data_hash,
+            "updated_at": func.now()
+        }
+        if alert_data.raw_payload:
+            update_values["labels"] = func.coalesce(Alert.labels, cast({}, JSONB)).op("||")(
+                func.jsonb_build_object(
+                    # timestamptz renders as an ISO-8601 JSON string
+                    cast("last_updated", Text), func.now(),
+                    cast("update_count", Text),
+                    func.coalesce(Alert.labels["update_count"].as_integer(), 0) + 1
+                )
+            )
+        
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Alert.organization_id, Alert.fingerprint],
+            set_=update_values
+        ).returning(
+            Alert.id,
+            Alert.incident_id,
+            # xmax is 0 only for a freshly inserted tuple
+            literal_column("(xmax = 0)").label("inserted")
+        )
+        
+        row = (await self.db.execute(stmt)).one()
+        
+        if not row.inserted:
+            await self.db.commit()
+            
+            return AlertProcessingResult(
+                success=True,
+                incident_id=str(row.incident_id) if row.incident_id else None,
+                incident_created=False,
+                incident_updated=True,
+                message="Alert updated, incident already exists",
+                alert_fingerprint=fingerprint
+            )
         
         # Decide if we should create an incident
         should_create_incident = await self._should_create_incident(alert_data, organization_id)
@@ -249,83 +530,12 @@ class AlertService:
         incident_created = False
         
         if should_create_incident:
-            try:
-                # FIXED: Create incident directly without service conflicts
-                incident_id = str(uuid.uuid4())
-                
-                # Map alert severity to incident severity properly
-                severity_map = {
-                    AlertSeverity.INFO: "low",
-                    AlertSeverity.WARNING: "medium", 
-                    AlertSeverity.ERROR: "high",
-                    AlertSeverity.HIGH: "high",
-                    AlertSeverity.CRITICAL: "critical"
-                }
-                
-                # Get severity string value
-                alert_severity = alert_data.severity
-                if hasattr(alert_severity, 'value'):
-                    severity_key = alert_severity
-                else:
-                    # Handle string values
-                    severity_key = AlertSeverity[alert_severity.upper()] if isinstance(alert_severity, str) else alert_severity
-                
-                mapped_severity = severity_map.get(severity_key, "medium")
-                
-                # Build comprehensive description
-                description_parts = [alert_data.description or f"Alert from {alert_data.source}"]
-                
-                if alert_data.alert_url:
-                    description_parts.append(f"🔗 **Alert URL**: {alert_data.alert_url}")
-                if alert_data.dashboard_url:
-                    description_parts.append(f"📊 **Dashboard**: {alert_data.dashboard_url}")
-                if alert_data.runbook_url:
-                    description_parts.append(f"📚 **Runbook**: {alert_data.runbook_url}")
-                
-                # Add technical context
-                context_parts = []
-                if alert_data.service:
-                    context_parts.append(f"Service: {alert_data.service}")
-                if alert_data.environment:
-                    context_parts.append(f"Environment: {alert_data.environment}")
-                if alert_data.region:
-                    context_parts.append(f"Region: {alert_data.region}")
-                if alert_data.host:
-                    context_parts.append(f"Host: {alert_data.host}")
-                
-                if context_parts:
-                    description_parts.append(f"**Context**: {' | '.join(context_parts)}")
-                
-                incident = Incident(
-                    id=incident_id,
-                    organization_id=organization_id,
-                    title=f"🚨 [{alert_data.service or 'Unknown'}] {alert_data.title}",
-                    description="\n\n".join(description_parts),
-                    severity=mapped_severity,  # Use string value
-                    status="open",  # Use string value
-                    created_at=datetime.utcnow(),
-                    updated_at=datetime.utcnow(),
-                    tags=[
-                        f"source:{alert_data.source.value if hasattr(alert_data.source, 'value') else str(alert_data.source)}",
-                        f"alert_id:{alert_data.alert_id}",
-                        f"severity:{alert_data.severity.value if hasattr(alert_data.severity, 'value') else str(alert_data.severity)}",
-                        "auto-created"
-                    ] + (alert_data.tags or [])
-                )
-                
-                self.db.add(incident)
-                await self.db.flush()
-                
-                # Link alert to incident
-                new_alert.incident_id = incident_id
-                incident_created = True
-                
-                logger.info(f"Created incident {incident_id} from alert {new_alert.id}")
-                
-            except Exception as e:
-                logger.error(f"Failed to create incident for alert {new_alert.id}: {e}")
-                # Don't fail the whole operation if incident creation fails
-                pass
+            # Queued in the UPSERT's transaction; the incident creator builds and links the incident
+            incident_id = str(uuid.uuid4())
+            self.db.add(self._incident_outbox_entry(alert_data, organization_id, row.id, incident_id))
+            incident_created = True
+            
+            logger.info(f"Queued incident {incident_id} for alert {row.id}")
         
         await self.db.commit()
         
@@ -334,20 +544,220 @@ class AlertService:
             incident_id=incident_id,
             incident_created=incident_created,
             incident_updated=False,
-            message="New alert processed" + (" and incident created" if incident_created else ""),
+            message="New alert processed" + (" and incident queued" if incident_created else ""),
             alert_fingerprint=fingerprint
         )
 
+    def _incident_outbox_entry(
+        self,
+        alert_data: GenericAlertPayload,
+        organization_id: str,
+        alert_id: uuid.UUID,
+        incident_id: str
+    ) -> IncidentOutbox:
+        """Outbox row asking the incident creator for an incident for this alert"""
+        return IncidentOutbox(
+            organization_id=organization_id,
+            alert_id=alert_id,
+            incident_id=incident_id,
+            payload=alert_data.model_dump(mode="json", include=_INCIDENT_PAYLOAD_FIELDS)
+        )
+
+    async def create_queued_incidents(self, limit: int = INCIDENT_OUTBOX_BATCH_SIZE) -> int:
+        """Create and link a batch of outboxed incidents, oldest first; returns the entries drained"""
+        
+        rows = (await self.db.execute(
+            select(
+                IncidentOutbox.id,
+                IncidentOutbox.organization_id,
+                IncidentOutbox.incident_id,
+                IncidentOutbox.payload,
+                IncidentOutbox.created_at,
+                Alert.status
+            )
+            .join(Alert, Alert.id == IncidentOutbox.alert_id)
+            .order_by(IncidentOutbox.created_at)
+            .limit(limit)
+            # Concurrent creators (one per app process) claim disjoint batches instead of blocking
+            .with_for_update(of=IncidentOutbox, skip_locked=True)
+        )).all()
+        
+        if not rows:
+            return 0
+        
+        # An alert that resolved while queued no longer needs its incident
+        pending = [row for row in rows if row.status != AlertStatus.RESOLVED]
+        
+        # Read from the rows: the Incident objects are expired by the commit
+        incident_ids = {row.id: row.incident_id for row in pending}
+        incidents = {}
+        for row in pending:
+            try:
+                incidents[row.id] = self._alert_to_incident(
+                    _payload_from_outbox(row.payload), row.organization_id, row.incident_id, row.created_at
+                )
+            except (KeyError, TypeError, ValueError) as e:
+                # A payload that cannot be rebuilt never will be; drop it rather than retry it forever
+                logger.error(f"Dropping outbox entry {row.id} with unusable payload {row.payload!r}: {e}")
+        
+        created = await self._insert_incidents(incidents) if incidents else []
+        
+        if created:
+            # Link every alert to its incident in one UPDATE ... FROM incident_outbox
+            await self.db.execute(
+                update(Alert)
+                .where(
+                    Alert.id == IncidentOutbox.alert_id,
+                    IncidentOutbox.id.in_(created)
+                )
+                .values(incident_id=IncidentOutbox.incident_id)
+                .execution_options(synchronize_session=False)
+            )
+        
+        await self.db.execute(
+            delete(IncidentOutbox).where(IncidentOutbox.id.in_([row.id for row in rows]))
+        )
+        await self.db.commit()
+        
+        for outbox_id in created:
+            self._schedule_incident_notification(str(incident_ids[outbox_id]))
+        if created:
+            # One batched embeddings call for the similar-incident search
+            self._schedule_background(embed_new_incidents([incident_ids[outbox_id] for outbox_id in created]))
+        
+        logger.info(f"Created {len(created)} incidents from {len(rows)} outbox entries")
+        return len(rows)
+
+    async def _insert_incidents(self, incidents: Dict[uuid.UUID, Incident]) -> List[uuid.UUID]:
+        """Insert outboxed incidents (keyed by outbox id); returns the outbox ids whose incident was inserted"""
+        
+        # Incident rows must exist before the alerts can reference them, so flush inside a savepoint
+        try:
+            async with self.db.begin_nested():
+                self.db.add_all(incidents.values())
+            return list(incidents)
+        except SQLAlchemyError as e:
+            logger.warning(f"Batch insert of {len(incidents)} incidents failed, retrying one by one: {e}")
+        
+        # Retry each incident in its own savepoint so one bad row only fails itself
+        created = []
+        for outbox_id, incident in incidents.items():
+            try:
+                async with self.db.begin_nested():
+                    self.db.add(incident)
+                created.append(outbox_id)
+            except SQLAlchemyError as e:
+                logger.error(f"Dropping outbox entry {outbox_id}: failed to create incident {incident.id}: {e}")
+        return created
+
+    def _schedule_incident_notification(self, incident_id: str) -> None:
+        """Send incident-created notifications without holding up the incident creator"""
+        self._schedule_background(_notify_incident_created(incident_id))
+
+    def _schedule_background(self, coro) -> None:
+        """Run follow-up work for created incidents without holding up the incident creator"""
+        task = asyncio.create_task(coro)
+        # The loop only keeps weak references; hold the task until it finishes
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
+    def _alert_to_incident(
+        self,
+        alert_data: GenericAlertPayload,
+        organization_id: str,
+        incident_id: str,
+        now: datetime
+    ) -> Incident:
+        """Build the Incident for an alert that warrants one"""
+        
+        # GenericAlertPayload validates severity to an AlertSeverity member, so this is a plain lookup
+        mapped_severity = SEVERITY_MAP.get(alert_data.severity, "medium")
+        
+        # Build comprehensive description and technical context, skipping absent fields
+        context = " | ".join(part for part in (
+            f"Service: {alert_data.service}" if alert_data.service else None,
+            f"Environment: {alert_data.environment}" if alert_data.environment else None,
+            f"Region: {alert_data.region}" if alert_data.region else None,
+            f"Host: {alert_data.host}" if alert_data.host else None,
+        ) if part)
+        
+        description = "\n\n".join(part for part in (
+            alert_data.description or f"Alert from {alert_data.source}",
+            f"🔗 **Alert URL**: {alert_data.alert_url}" if alert_data.alert_url else None,
+            f"📊 **Dashboard**: {alert_data.dashboard_url}" if alert_data.dashboard_url else None,
+            f"📚 **Runbook**: {alert_data.runbook_url}" if alert_data.runbook_url else None,
+            f"**Context**: {context}" if context else None,
+        ) if part)
+        
+        source = alert_data.source.value
+        severity = alert_data.severity.value
+        
+        return Incident(
+            id=incident_id,
+            organization_id=organization_id,
+            # Built in one f-string; the prefix can push a max-length alert title past the column
+            title=f"🚨 [{alert_data.service or 'Unknown'}] {alert_data.title}"[:INCIDENT_TITLE_MAX_LENGTH],
+            description=description,
+            severity=mapped_severity,  # Use string value
+            status="open",  # Use string value
+            created_at=now,
+            updated_at=now,
+            tags=[
+                f"source:{source}",
+                f"alert_id:{alert_data.alert_id}",
+                f"severity:{severity}",
+                "auto-created",
+                *(alert_data.tags or ())
+            ]
+        )
+
     async def _handle_resolved_alert(
         self,
         alert_data: GenericAlertPayload,
-        existing_alert: Optional[Alert],
         fingerprint: str,
         organization_id: str
     ) -> AlertProcessingResult:
-        """Handle a resolved alert"""
+        """Handle a resolved alert in one statement (no ORM rows are loaded)"""
         
-        if not existing_alert:
+        # Resolve the alert and, if it was the last active alert of its incident, the incident too:
+        # UPDATE alerts ... RETURNING feeds UPDATE incidents ... FROM in a single round-trip
+        resolved_alert = (
+            update(Alert)
+            .where(
+                and_(
+                    Alert.fingerprint == fingerprint,
+                    Alert.organization_id == organization_id
+                )
+            )
+            .values(
+                status=AlertStatus.RESOLVED,
+                ended_at=alert_data.resolved_at or func.now(),
+                updated_at=func.now()
+            )
+            .returning(Alert.id, Alert.incident_id, _HAS_OTHER_ACTIVE.label("has_other_active"))
+            .cte("resolved_alert")
+        )
+        resolved_incident = (
+            update(Incident)
+            .where(
+                and_(
+                    Incident.id == resolved_alert.c.incident_id,
+                    ~resolved_alert.c.has_other_active
+                )
+            )
+            .values(status="resolved", resolved_at=func.now(), updated_at=func.now())
+            .returning(Incident.id)
+            .cte("resolved_incident")
+        )
+        result = await self.db.execute(
+            select(
+                resolved_alert.c.incident_id,
+                resolved_incident.c.id.is_not(None).label("incident_resolved")
+            ).outerjoin(resolved_incident, resolved_incident.c.id == resolved_alert.c.incident_id)
+        )
+        row = result.one_or_none()
+        
+        if row is None:
             logger.warning(f"Cannot resolve alert that doesn't exist: {fingerprint}")
             return AlertProcessingResult(
                 success=False,
@@ -355,38 +765,10 @@ class AlertService:
                 alert_fingerprint=fingerprint
             )
         
-        # Update alert status
-        existing_alert.status = AlertStatus.RESOLVED
-        existing_alert.ended_at = alert_data.resolved_at or datetime.utcnow()
-        existing_alert.updated_at = datetime.utcnow()
-        
-        incident_updated = False
-        incident_id = None
-        
-        # If alert has associated incident, consider auto-resolving it
-        if existing_alert.incident_id:
-            incident_id = str(existing_alert.incident_id)
-            
-            # Check if this is the only active alert for the incident
-            other_active_alerts = await self._count_active_alerts_for_incident(
-                existing_alert.incident_id, organization_id
-            )
-            
-            if other_active_alerts == 0:
-                # Auto-resolve the incident
-                try:
-                    incident_result = await self.db.execute(
-                        select(Incident).where(Incident.id == existing_alert.incident_id)
-                    )
-                    incident = incident_result.scalar_one_or_none()
-                    if incident:
-                        incident.status = "resolved"
-                        incident.resolved_at = datetime.utcnow()
-                        incident.updated_at = datetime.utcnow()
-                    incident_updated = True
-                    logger.info(f"Auto-resolved incident {incident_id} as all alerts resolved")
-                except Exception as e:
-                    logger.error(f"Failed to auto-resolve incident {incident_id}: {e}")
+        incident_id = str(row.incident_id) if row.incident_id else None
+        incident_updated = row.incident_resolved
+        if incident_updated:
+            logger.info(f"Auto-resolved incident {incident_id} as all alerts resolved")
         
         await self.db.commit()
         
@@ -399,22 +781,27 @@ class AlertService:
             alert_fingerprint=fingerprint
         )
 
-    async def _count_active_alerts_for_incident(
-        self, 
-        incident_id: str, 
-        organization_id: str
-    ) -> int:
-        """Count active alerts for an incident (excluding the current one being resolved)"""
-        result = await self.db.execute(
-            select(func.count(Alert.id)).where(
-                and_(
-                    Alert.incident_id == incident_id,
-                    Alert.organization_id == organization_id,
-                    Alert.status == AlertStatus.ACTIVE
-                )
+    @staticmethod
+    def _static_incident_decision(alert_data: GenericAlertPayload) -> Optional[bool]:
+        """Payload-only incident rules; None when the decision needs the flapping/maintenance checks"""
+        
+        environment = alert_data.environment.lower() if alert_data.environment else None
+        if environment in STRICT_PRODUCTION_ENVIRONMENTS:
+            env_class = "prod"
+        elif environment in PRODUCTION_ENVIRONMENTS:
+            env_class = "live"
+        else:
+            env_class = None
+        
+        decision = _STATIC_INCIDENT_DECISIONS.get((alert_data.severity, env_class))
+        if decision is _CRITICAL_SERVICE_ONLY:
+            # Info alerts in production only open incidents for critical services
+            decision = bool(alert_data.service) and any(
+                cs in alert_data.service.lower() for cs in CRITICAL_SERVICES
             )
-        )
-        return result.scalar()
+        
+        logger.debug(f"Static incident decision {decision} for {alert_data.severity} in {environment}")
+        return decision
 
     async def _should_create_incident(
         self, 
@@ -423,72 +810,115 @@ class AlertService:
     ) -> bool:
         """Enhanced AI-powered decision: should this alert create an incident?"""
         
-        # Always create incident for critical alerts
-        if alert_data.severity == AlertSeverity.CRITICAL:
-            logger.info("Creating incident for critical alert")
-            return True
-        
-        # Create incident for error severity in production
-        if (alert_data.severity in [AlertSeverity.ERROR, AlertSeverity.HIGH] and 
-            alert_data.environment and 
-            alert_data.environment.lower() in ["prod", "production", "live"]):
-            logger.info("Creating incident for production error")
-            return True
-        
-        # Don't create incidents for info alerts unless in production
-        if alert_data.severity == AlertSeverity.INFO:
-            if alert_data.environment and alert_data.environment.lower() in ["prod", "production"]:
-                # Only for critical services in production
-                critical_services = ["payment", "auth", "database", "api-gateway"]
-                if alert_data.service and any(cs in alert_data.service.lower() for cs in critical_services):
-                    logger.info("Creating incident for critical service info alert in production")
-                    return True
-            logger.info("Skipping incident creation for info alert")
-            return False
+        decision = self._static_incident_decision(alert_data)
+        if decision is not None:
+            return decision
         
         # Check for alert frequency (don't create incidents for flapping alerts)
         if await self._is_flapping_alert(alert_data, organization_id):
             logger.info("Skipping incident creation for flapping alert")
             return False
         
+        return await self._default_incident_decision(alert_data, organization_id)
+
+    async def _should_create_incident_batch(
+        self,
+        payloads: List[GenericAlertPayload],
+        organization_id: str
+    ) -> List[bool]:
+        """Same decision as _should_create_incident for a whole webhook batch, with one flapping query"""
+        
+        decisions = [self._static_incident_decision(payload) for payload in payloads]
+        undecided = [index for index, decision in enumerate(decisions) if decision is None]
+        if not undecided:
+            return decisions
+        
+        flapping = await self._flapping_fingerprints(
+            {self.generate_alert_fingerprint(payloads[index]) for index in undecided},
+            organization_id
+        )
+        for index in undecided:
+            payload = payloads[index]
+            if self.generate_alert_fingerprint(payload) in flapping:
+                logger.info("Skipping incident creation for flapping alert")
+                decisions[index] = False
+            else:
+                decisions[index] = await self._default_incident_decision(payload, organization_id)
+        
+        return decisions
+
+    async def _default_incident_decision(
+        self,
+        alert_data: GenericAlertPayload,
+        organization_id: str
+    ) -> bool:
+        """Decision for alerts no payload rule matched and that are not flapping"""
+        
         # Check for maintenance windows
         if await self._is_in_maintenance_window(alert_data, organization_id):
             logger.info("Skipping incident creation during maintenance window")
             return False
         
         # Default: create incident for warning/error alerts
-        should_create = alert_data.severity in [AlertSeverity.WARNING, AlertSeverity.ERROR]
+        should_create = alert_data.severity in DEFAULT_INCIDENT_SEVERITIES
         logger.info(f"Default incident creation decision: {should_create} for severity {alert_data.severity}")
         return should_create
 
-    async def _is_flapping_alert(
-        self, 
-        alert_data: GenericAlertPayload, 
+    async def _flapping_fingerprints(
+        self,
+        fingerprints: set,
         organization_id: str,
         time_window_minutes: int = 30,
         threshold: int = 5
-    ) -> bool:
-        """Check if this alert is flapping (firing and resolving repeatedly)"""
+    ) -> set:
+        """Fingerprints among `fingerprints` that are flapping; one grouped query for the cache misses"""
+        cache_prefix = (str(organization_id), time_window_minutes, threshold)
+        flapping = set()
+        misses = set()
+        for fingerprint in fingerprints:
+            cached = _flapping_cache.get((*cache_prefix, fingerprint))
+            if cached is None:
+                misses.add(fingerprint)
+            elif cached:
+                flapping.add(fingerprint)
+        if not misses:
+            return flapping
+        
         try:
-            # Look for alerts with same fingerprint in the last time window
-            time_threshold = datetime.utcnow() - timedelta(minutes=time_window_minutes)
-            fingerprint = self.generate_alert_fingerprint(alert_data)
+            time_threshold = datetime.now(timezone.utc) - timedelta(minutes=time_window_minutes)
+            miss_list = list(misses)
             
             result = await self.db.execute(
-                select(func.count(Alert.id)).where(
+                lambda_stmt(lambda: select(Alert.fingerprint).where(
                     and_(
-                        Alert.fingerprint == fingerprint,
+                        Alert.fingerprint.in_(miss_list),
                         Alert.organization_id == organization_id,
                         Alert.created_at >= time_threshold
                     )
-                )
+                ).group_by(Alert.fingerprint).having(func.count(Alert.id) >= threshold))
             )
-            count = result.scalar()
-            
-            return count >= threshold
+            newly_flapping = set(result.scalars().all())
         except Exception as e:
-            logger.error(f"Error checking flapping alert: {e}")
-            return False
+            logger.error(f"Error checking flapping alerts: {e}")
+            return flapping
+        
+        for fingerprint in misses:
+            _flapping_cache[(*cache_prefix, fingerprint)] = fingerprint in newly_flapping
+        return flapping | newly_flapping
+
+    async def _is_flapping_alert(
+        self, 
+        alert_data: GenericAlertPayload, 
+        organization_id: str,
+        time_window_minutes: int = 30,
+        threshold: int = 5
+    ) -> bool:
+        """Check if this alert is flapping (firing and resolving repeatedly)"""
+        fingerprint = self.generate_alert_fingerprint(alert_data)
+        flapping = await self._flapping_fingerprints(
+            {fingerprint}, organization_id, time_window_minutes, threshold
+        )
+        return fingerprint in flapping
 
     async def _is_in_maintenance_window(
         self, 
@@ -508,45 +938,20 @@ class AlertService:
         user_id: Optional[str] = None
     ) -> AlertResponse:
         """Acknowledge an alert"""
-        alert = await self.get_alert_by_id(alert_id, organization_id)
-        if not alert:
-            raise ValueError("Alert not found")
-        
-        alert.status = AlertStatus.ACKNOWLEDGED
-        alert.updated_at = datetime.utcnow()
-        
-        # Update labels with acknowledgment info
-        if not alert.labels:
-            alert.labels = {}
-        alert.labels.update({
-            "acknowledged_at": datetime.utcnow().isoformat(),
-            "acknowledged_by": user_id if user_id else "system"
-        })
-        
-        await self.db.commit()
+        response = await self._set_alert_status(
+            alert_id,
+            organization_id,
+            AlertStatus.ACKNOWLEDGED,
+            "acknowledged_at",
+            # Update labels with acknowledgment info
+            {
+                "acknowledged_by": user_id if user_id else "system"
+            }
+        )
         
         logger.info(f"Alert {alert_id} acknowledged by {user_id or 'system'}")
         
-        return AlertResponse(
-            id=str(alert.id),
-            external_id=alert.external_id,
-            fingerprint=alert.fingerprint,
-            title=alert.title,
-            description=alert.description,
-            severity=alert.severity,
-            status=alert.status,
-            source=alert.source,
-            service_name=alert.service_name,
-            environment=alert.environment,
-            host=alert.host,
-            incident_id=str(alert.incident_id) if alert.incident_id else None,
-            started_at=alert.started_at,
-            ended_at=alert.ended_at,
-            created_at=alert.created_at,
-            updated_at=alert.updated_at,
-            labels=alert.labels,
-            raw_data=alert.raw_data
-        )
+        return response
 
     async def suppress_alert(
         self, 
@@ -556,115 +961,112 @@ class AlertService:
         reason: Optional[str] = None
     ) -> AlertResponse:
         """Suppress an alert (prevent it from creating incidents)"""
-        alert = await self.get_alert_by_id(alert_id, organization_id)
-        if not alert:
-            raise ValueError("Alert not found")
-        
-        alert.status = AlertStatus.SUPPRESSED
-        alert.updated_at = datetime.utcnow()
-        
-        # Update labels with suppression info
-        if not alert.labels:
-            alert.labels = {}
-        alert.labels.update({
-            "suppressed_at": datetime.utcnow().isoformat(),
-            "suppressed_by": user_id if user_id else "system",
-            "suppression_reason": reason or "Manual suppression"
-        })
-        
-        await self.db.commit()
+        response = await self._set_alert_status(
+            alert_id,
+            organization_id,
+            AlertStatus.SUPPRESSED,
+            "suppressed_at",
+            # Update labels with suppression info
+            {
+                "suppressed_by": user_id if user_id else "system",
+                "suppression_reason": reason or "Manual suppression"
+            }
+        )
         
         logger.info(f"Alert {alert_id} suppressed by {user_id or 'system'}: {reason}")
         
-        return AlertResponse(
-            id=str(alert.id),
-            external_id=alert.external_id,
-            fingerprint=alert.fingerprint,
-            title=alert.title,
-            description=alert.description,
-            severity=alert.severity,
-            status=alert.status,
-            source=alert.source,
-            service_name=alert.service_name,
-            environment=alert.environment,
-            host=alert.host,
-            incident_id=str(alert.incident_id) if alert.incident_id else None,
-            started_at=alert.started_at,
-            ended_at=alert.ended_at,
-            created_at=alert.created_at,
-            updated_at=alert.updated_at,
-            labels=alert.labels,
-            raw_data=alert.raw_data
+        return response
+
+    async def _set_alert_status(
+        self,
+        alert_id: str,
+        organization_id: str,
+        status: AlertStatus,
+        timestamp_label: str,
+        label_patch: Dict[str, Any]
+    ) -> AlertResponse:
+        """Set an alert's status and merge `label_patch` plus a `timestamp_label`: now() entry into its labels, in one UPDATE"""
+        result = await self.db.execute(
+            update(Alert)
+            .where(
+                and_(
+                    Alert.id == alert_id,
+                    Alert.organization_id == organization_id
+                )
+            )
+            .values(
+                status=status,
+                updated_at=func.now(),
+                # JSONB || merges in place; no read-modify-write, so concurrent label updates aren't lost
+                labels=func.coalesce(Alert.labels, cast({}, JSONB)).op("||")(cast(label_patch, JSONB)).op("||")(
+                    func.jsonb_build_object(cast(timestamp_label, Text), func.now())
+                )
+            )
+            .returning(Alert)
         )
+        alert = result.scalar_one_or_none()
+        if not alert:
+            raise ValueError("Alert not found")
+        
+        # Build the response before commit expires the row
+        response = AlertResponse.model_validate(alert)
+        await self.db.commit()
+        return response
 
     async def get_alert_statistics(
         self, 
         organization_id: str,
         days: int = 7
     ) -> Dict[str, Any]:
-        """Get alert statistics for the organization"""
+        """Get alert statistics for the organization (cached for a minute; generated_at tells when)"""
+        
+        cache_key = (str(organization_id), days)
+        cached = _statistics_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         try:
-            time_threshold = datetime.utcnow() - timedelta(days=days)
+            time_threshold = func.now() - timedelta(days=days)
             
-            # Total alerts
-            total_result = await self.db.execute(
-                select(func.count(Alert.id)).where(
-                    and_(
-                        Alert.organization_id == organization_id,
-                        Alert.created_at >= time_threshold
-                    )
-                )
-            )
-            total_alerts = total_result.scalar()
-            
-            # Active alerts
-            active_result = await self.db.execute(
-                select(func.count(Alert.id)).where(
+            # One scan of the window, aggregated four ways: overall, per severity, per source, per service.
+            # GROUPING() is a bitmask of the columns a row is *not* grouped by (severity is the high bit).
+            grouping_id = func.grouping(Alert.severity, Alert.source, Alert.service_name)
+            result = await self.db.execute(
+                select(
+                    Alert.severity,
+                    Alert.source,
+                    Alert.service_name,
+                    grouping_id.label("grouping_id"),
+                    func.count().label("total"),
+                    func.count().filter(Alert.status == AlertStatus.ACTIVE).label("active")
+                ).where(
                     and_(
                         Alert.organization_id == organization_id,
-                        Alert.status == AlertStatus.ACTIVE,
                         Alert.created_at >= time_threshold
                     )
+                ).group_by(
+                    func.grouping_sets(text("()"), Alert.severity, Alert.source, Alert.service_name)
                 )
             )
-            active_alerts = active_result.scalar()
             
-            # Alerts by severity
-            severity_result = await self.db.execute(
-                select(Alert.severity, func.count(Alert.id)).where(
-                    and_(
-                        Alert.organization_id == organization_id,
-                        Alert.created_at >= time_threshold
-                    )
-                ).group_by(Alert.severity)
-            )
-            severity_counts = dict(severity_result.all())
-            
-            # Alerts by source
-            source_result = await self.db.execute(
-                select(Alert.source, func.count(Alert.id)).where(
-                    and_(
-                        Alert.organization_id == organization_id,
-                        Alert.created_at >= time_threshold
-                    )
-                ).group_by(Alert.source)
-            )
-            source_counts = dict(source_result.all())
+            total_alerts = active_alerts = 0
+            severity_counts = {}
+            source_counts = {}
+            service_counts = {}
+            for row in result.all():
+                if row.grouping_id == _GROUPED_BY_NOTHING:
+                    total_alerts, active_alerts = row.total, row.active
+                elif row.grouping_id == _GROUPED_BY_SEVERITY:
+                    severity_counts[row.severity] = row.total
+                elif row.grouping_id == _GROUPED_BY_SOURCE:
+                    source_counts[row.source] = row.total
+                elif row.service_name is not None:
+                    service_counts[row.service_name] = row.total
             
             # Top services by alert count
-            service_result = await self.db.execute(
-                select(Alert.service_name, func.count(Alert.id)).where(
-                    and_(
-                        Alert.organization_id == organization_id,
-                        Alert.service_name.isnot(None),
-                        Alert.created_at >= time_threshold
-                    )
-                ).group_by(Alert.service_name).order_by(desc(func.count(Alert.id))).limit(10)
-            )
-            top_services = dict(service_result.all())
+            top_services = dict(sorted(service_counts.items(), key=lambda item: item[1], reverse=True)[:10])
             
-            return {
+            statistics = {
                 "period_days": days,
                 "total_alerts": total_alerts,
                 "active_alerts": active_alerts,
@@ -673,14 +1075,16 @@ class AlertService:
                 "severity_breakdown": severity_counts,
                 "source_breakdown": source_counts,
                 "top_services": top_services,
-                "generated_at": datetime.utcnow().isoformat()
+                "generated_at": datetime.now(timezone.utc).isoformat()
             }
+            _statistics_cache[cache_key] = statistics
+            return statistics
             
         except Exception as e:
             logger.error(f"Error generating alert statistics: {e}")
             return {
                 "error": "Failed to generate statistics",
-                "generated_at": datetime.utcnow().isoformat()
+                "generated_at": datetime.now(timezone.utc).isoformat()
             }
 
     async def create_alert(
@@ -691,23 +1095,17 @@ class AlertService:
         """Create a new alert directly (for API usage)"""
         
         # Generate fingerprint for deduplication
-        generic_payload = GenericAlertPayload(
-            alert_id=alert_data.external_id,
-            title=alert_data.title,
-            description=alert_data.description,
-            severity=alert_data.severity,
-            status=alert_data.status,
-            source=alert_data.source,
-            service=alert_data.service_name,
-            environment=alert_data.environment,
-            host=alert_data.host,
-            started_at=alert_data.started_at,
-            raw_payload=alert_data.raw_data or {}
+        fingerprint = self._fingerprint_fields(
+            alert_data.external_id,
+            alert_data.title,
+            alert_data.service_name,
+            alert_data.source,
+            alert_data.environment
         )
         
-        fingerprint = self.generate_alert_fingerprint(generic_payload)
-        
-        new_alert = Alert(
+        raw_data = alert_data.raw_data or {}
+        stmt = pg_insert(Alert).values(
+            id=uuid.uuid4(),
             organization_id=organization_id,
             external_id=alert_data.external_id,
             fingerprint=fingerprint,
@@ -719,33 +1117,34 @@ class AlertService:
             service_name=alert_data.service_name,
             environment=alert_data.environment,
             host=alert_data.host,
-            started_at=alert_data.started_at or datetime.utcnow(),
-            raw_data=alert_data.raw_data or {},
+            started_at=alert_data.started_at or func.now(),
+            raw_data=raw_data,
+            raw_data_hash=_raw_data_hash(raw_data),
             labels=alert_data.labels or {}
         )
         
-        self.db.add(new_alert)
+        # Same alert posted again (uq_alerts_org_fingerprint): refresh the existing row like a re-fire
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Alert.organization_id, Alert.fingerprint],
+            set_={
+                "description": stmt.excluded.description,
+                "severity": stmt.excluded.severity,
+                "status": stmt.excluded.status,
+                "host": stmt.excluded.host,
+                "raw_data": stmt.excluded.raw_data,
+                "raw_data_hash": stmt.excluded.raw_data_hash,
+                "labels": stmt.excluded.labels,
+                "updated_at": func.now()
+            }
+        ).returning(Alert)
+        
+        result = await self.db.execute(stmt)
+        new_alert = result.scalar_one()
+        
+        # Build the response before commit expires the row
+        response = AlertResponse.model_validate(new_alert)
         await self.db.commit()
         
-        logger.info(f"Created alert {new_alert.id} via API")
-        
-        return AlertResponse(
-            id=str(new_alert.id),
-            external_id=new_alert.external_id,
-            fingerprint=new_alert.fingerprint,
-            title=new_alert.title,
-            description=new_alert.description,
-            severity=new_alert.severity,
-            status=new_alert.status,
-            source=new_alert.source,
-            service_name=new_alert.service_name,
-            environment=new_alert.environment,
-            host=new_alert.host,
-            incident_id=str(new_alert.incident_id) if new_alert.incident_id else None,
-            started_at=new_alert.started_at,
-            ended_at=new_alert.ended_at,
-            created_at=new_alert.created_at,
-            updated_at=new_alert.updated_at,
-            labels=new_alert.labels,
-            raw_data=new_alert.raw_data
-        )
\ No newline at end of file
+        logger.info(f"Created or refreshed alert {response.id} via API")
+        
+        return response
\ No newline at end of file
@@ -1,13 +1,17 @@
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, exists
 from app.models.user import User
 from app.models.organization import Organization
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_password, verify_password_for_missing_user
 from app.schemas.auth import UserRegister
 from typing import Optional, Tuple
 import uuid
 import re
 
+# Runs of non-alphanumerics collapse to one dash in a single pass
+_SLUG_SEPARATORS = re.compile(r'[^a-zA-Z0-9]+')
+
 class AuthService:
     
     @staticmethod
@@ -19,38 +23,39 @@ class AuthService:
         
         # Create organization slug from name if not provided
         if not user_data.organization_slug:
-            slug = re.sub(r'[^a-zA-Z0-9]', '-', user_data.organization_name or "my-org").lower()
-            slug = re.sub(r'-+', '-', slug).strip('-')
+            slug = _SLUG_SEPARATORS.sub('-', user_data.organization_name or "my-org").lower().strip('-')
         else:
             slug = user_data.organization_slug
         
-        # Check if email already exists
+        # Check email and organization slug availability in one round-trip
         result = await db.execute(
-            select(User).where(User.email == user_data.email)
+            select(
+                exists().where(User.email == user_data.email).label("email_taken"),
+                exists().where(Organization.slug == slug).label("slug_taken")
+            )
         )
-        if result.scalar_one_or_none():
+        email_taken, slug_taken = result.one()
+        if email_taken:
             raise ValueError("Email already registered")
-        
-        # Check if organization slug already exists
-        result = await db.execute(
-            select(Organization).where(Organization.slug == slug)
-        )
-        if result.scalar_one_or_none():
+        if slug_taken:
             raise ValueError("Organization slug already taken")
         
-        # Create organization
+        # Create organization; the id is assigned here so the user can reference it without a flush
         organization = Organization(
+            id=uuid.uuid4(),
             name=user_data.organization_name or f"{user_data.full_name}'s Organization",
             slug=slug,
             plan="free"
         )
         db.add(organization)
-        await db.flush()  # Get the ID without committing
+        
+        # bcrypt is deliberately slow; hash on a worker thread so the event loop keeps serving requests
+        password_hash = await asyncio.to_thread(get_password_hash, user_data.password)
         
         # Create user
         user = User(
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=password_hash,
             full_name=user_data.full_name,
             organization_id=organization.id,
             role="admin",  # First user is admin
@@ -58,6 +63,7 @@ class AuthService:
         )
         db.add(user)
         
+        # One flush inserts both rows (organization first, by foreign key order)
         await db.commit()
         await db.refresh(organization)
         await db.refresh(user)
@@ -81,9 +87,10 @@ class AuthService:
         user = result.scalar_one_or_none()
         
         if not user:
+            await asyncio.to_thread(verify_password_for_missing_user, password)
             return None
         
-        if not verify_password(password, user.password_hash):
+        if not await asyncio.to_thread(verify_password, password, user.password_hash):
             return None
         
         return user
\ No newline at end of file
@@ -1,12 +1,22 @@
 # backend/app/services/claude_code_service.py
 import asyncio
+import collections
+import hashlib
 import json
 import subprocess
 import tempfile
 import os
-from typing import Dict, List, Optional, Any
+import re
+import shlex
+import signal
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 import aiohttp
+import orjson
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -14,6 +24,284 @@ from app.models.incident import Incident
 from app.schemas.ai import AutoResolutionPlan, ResolutionStep, RiskLevel, CommandType
 
 
+# System keywords mapping
+SYSTEM_KEYWORDS = {
+    'database': ['postgres', 'mysql', 'mongodb', 'redis', 'db'],
+    'api': ['api', 'service', 'endpoint', 'rest'],
+    'web': ['nginx', 'apache', 'web', 'frontend'],
+    'queue': ['kafka', 'rabbitmq', 'sqs', 'queue'],
+    'cache': ['redis', 'memcached', 'cache'],
+    'auth': ['auth', 'login', 'oauth', 'jwt'],
+    'payment': ['payment', 'billing', 'stripe', 'paypal']
+}
+
+# keyword -> systems it indicates (a keyword such as 'redis' can map to several)
+_KEYWORD_SYSTEMS: Dict[str, List[str]] = {}
+for _system, _keywords in SYSTEM_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_SYSTEMS.setdefault(_keyword, []).append(_system)
+
+# Substring semantics like the original `keyword in text`: the lookahead reports matches at
+# every position, so overlapping keywords ("restripe" -> rest, stripe) are all found
+_SYSTEM_KEYWORD_RE = re.compile(
+    "(?=(" + "|".join(re.escape(keyword) for keyword in sorted(_KEYWORD_SYSTEMS, key=len, reverse=True)) + "))"
+)
+
+# Commands a resolution plan must never run
+DANGEROUS_COMMAND_PATTERNS = (
+    "rm -rf", "dd if=", "mkfs", "fdisk", 
+    "shutdown", "reboot", "killall",
+    "DROP TABLE", "DELETE FROM", "TRUNCATE",
+    "format", "del /f", "rmdir /s"
+)
+
+# casefolded pattern -> pattern as reported
+_DANGEROUS_BY_FOLDED = {pattern.casefold(): pattern for pattern in DANGEROUS_COMMAND_PATTERNS}
+
+# All patterns in one scan of the command; the lookahead reports matches at every position,
+# so overlapping patterns are all found (substring semantics, like `pattern in command`)
+_DANGEROUS_COMMAND_RE = re.compile(
+    "(?=(" + "|".join(re.escape(pattern) for pattern in sorted(_DANGEROUS_BY_FOLDED, key=len, reverse=True)) + "))"
+)
+
+# Database-specific troubleshooting steps
+_DATABASE_TROUBLESHOOTING_STEPS: Tuple[ResolutionStep, ...] = (
+    ResolutionStep(
+        order=1,
+        description="Check database connection",
+        command="pg_isready -h localhost -p 5432",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="localhost:5432 - accepting connections",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=2,
+        description="Check database disk space",
+        command="df -h /var/lib/postgresql",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="Disk usage information",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=3,
+        description="Restart database if needed",
+        command="sudo systemctl restart postgresql",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="Service restarted successfully",
+        rollback_command="sudo systemctl stop postgresql",
+        timeout_seconds=60,
+        critical=True
+    )
+)
+
+# Service-specific troubleshooting steps
+_SERVICE_TROUBLESHOOTING_STEPS: Tuple[ResolutionStep, ...] = (
+    ResolutionStep(
+        order=1,
+        description="Check service health",
+        command="curl -f http://localhost:8080/health",
+        command_type=CommandType.API_CALL,
+        expected_result="HTTP 200 OK",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=2,
+        description="Check service logs",
+        command="tail -n 50 /var/log/service.log",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="Recent log entries",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=3,
+        description="Restart service",
+        command="sudo systemctl restart myservice",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="Service restarted",
+        rollback_command="sudo systemctl stop myservice",
+        timeout_seconds=60,
+        critical=True
+    )
+)
+
+# Resource usage troubleshooting steps
+_RESOURCE_TROUBLESHOOTING_STEPS: Tuple[ResolutionStep, ...] = (
+    ResolutionStep(
+        order=1,
+        description="Check system resources",
+        command="free -h && top -bn1 | head -20",
+        command_type=CommandType.CLI_COMMAND,
+        use_shell=True,
+        expected_result="Resource usage information",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=2,
+        description="Identify resource-heavy processes",
+        command="ps aux --sort=-%cpu | head -10",
+        command_type=CommandType.CLI_COMMAND,
+        use_shell=True,
+        expected_result="Top CPU-consuming processes",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=3,
+        description="Scale application if containerized",
+        command="kubectl scale deployment myapp --replicas=3",
+        command_type=CommandType.KUBERNETES,
+        expected_result="Deployment scaled",
+        rollback_command="kubectl scale deployment myapp --replicas=1",
+        timeout_seconds=120,
+        critical=True
+    )
+)
+
+# Generic troubleshooting steps
+_GENERIC_TROUBLESHOOTING_STEPS: Tuple[ResolutionStep, ...] = (
+    ResolutionStep(
+        order=1,
+        description="Check system status",
+        command="systemctl status",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="System status information",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=2,
+        description="Check recent logs",
+        command="journalctl -n 50 --no-pager",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="Recent system logs",
+        rollback_command=None,
+        timeout_seconds=30
+    ),
+    ResolutionStep(
+        order=3,
+        description="Verify network connectivity",
+        command="ping -c 3 8.8.8.8",
+        command_type=CommandType.CLI_COMMAND,
+        expected_result="Network connectivity confirmed",
+        rollback_command=None,
+        timeout_seconds=30
+    )
+)
+
+# Fallback templates, first match on the incident text wins; built once since the steps never change
+_FALLBACK_TEMPLATES = (
+    (("database", "db"), _DATABASE_TROUBLESHOOTING_STEPS),
+    (("api", "service"), _SERVICE_TROUBLESHOOTING_STEPS),
+    (("memory", "cpu"), _RESOURCE_TROUBLESHOOTING_STEPS),
+)
+
+# Output kept per stream of a CLI step; a chatty command (kubectl logs, ...) keeps only its tail
+COMMAND_OUTPUT_LIMIT_BYTES = 64 * 1024
+
+async def _read_bounded(stream: asyncio.StreamReader, limit: int = COMMAND_OUTPUT_LIMIT_BYTES) -> bytes:
+    """Drain a stream to EOF, keeping only its last `limit` bytes"""
+    chunks = collections.deque()
+    size = 0
+    while chunk := await stream.read(4096):
+        chunks.append(chunk)
+        size += len(chunk)
+        while size - len(chunks[0]) >= limit:
+            size -= len(chunks.popleft())
+    return b"".join(chunks)[-limit:]
+
+# Whether a workspace holds terraform files; one plan runs several terraform steps in the same workspace
+_terraform_workspace_cache = TTLCache(maxsize=256, ttl=30)
+
+def _is_terraform_workspace(workspace_path: str) -> bool:
+    """Whether the directory has any *.tf files (cached briefly)"""
+    is_workspace = _terraform_workspace_cache.get(workspace_path)
+    if is_workspace is None:
+        is_workspace = _terraform_workspace_cache[workspace_path] = any(Path(workspace_path).glob("*.tf"))
+    return is_workspace
+
+async def _terminate_process_group(process: asyncio.subprocess.Process, grace_seconds: float = 2) -> None:
+    """SIGTERM the step's process group, SIGKILL it if still alive after the grace period, then reap"""
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), grace_seconds)
+        except TimeoutError:
+            os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass  # Already gone
+    # Reap so no zombie is left behind
+    await process.wait()
+
+def _dry_run_result(kind: str, command: str, output: str) -> Dict[str, Any]:
+    """Result of a step that was only simulated"""
+    return {
+        "status": "success",
+        "message": f"{kind} simulated: {command}",
+        "output": output,
+        "execution_time": 0.1
+    }
+
+# Request headers shared by every Claude Code API call (Authorization is added per service)
+_API_HEADERS = MappingProxyType({
+    "Content-Type": "application/json",
+    "X-API-Version": "2024-01-01"
+})
+
+# Claude Code plans by incident signature; repeat incidents from the same flaky service skip the API call
+_resolution_plan_cache = TTLCache(maxsize=1024, ttl=300)
+
+def _resolution_plan_key(incident_context: Dict[str, Any]) -> str:
+    """Signature of what the plan depends on: title, severity, affected systems, infrastructure context"""
+    signature = "|".join((
+        incident_context["title"].lower(),
+        incident_context["severity"],
+        ",".join(sorted(incident_context["affected_systems"])),
+        orjson.dumps(
+            incident_context["infrastructure_context"],
+            option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            default=str
+        ).decode()
+    ))
+    return hashlib.blake2b(signature.encode(), digest_size=16).hexdigest()
+
+# Services are per-request, so the HTTP session (and its keep-alive/TLS connections) lives here
+_http_session: Optional[aiohttp.ClientSession] = None
+
+def _get_http_session() -> aiohttp.ClientSession:
+    """Shared session for Claude Code API calls and API-call resolution steps"""
+    global _http_session
+    if _http_session is None or _http_session.closed:
+        _http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=64, ttl_dns_cache=300, keepalive_timeout=60)
+        )
+    return _http_session
+
+async def close_http_session() -> None:
+    """Close the shared session (app shutdown)"""
+    if _http_session is not None and not _http_session.closed:
+        await _http_session.close()
+
+def _incident_text(incident: Incident) -> str:
+    """Lowercased title + description, the text keyword matching runs on"""
+    return (incident.title + " " + (incident.description or "")).lower()
+
+@lru_cache(maxsize=2048)
+def _extract_systems(text: str) -> Tuple[str, ...]:
+    """Affected systems for an incident's lowercased text; memoized since repeat incidents share their text"""
+    
+    # One C-level scan instead of a substring test per keyword
+    matched = set()
+    for keyword in _SYSTEM_KEYWORD_RE.findall(text):
+        matched.update(_KEYWORD_SYSTEMS[keyword])
+    
+    systems = tuple(system for system in SYSTEM_KEYWORDS if system in matched)
+    return systems if systems else ('general',)
+
 class ClaudeCodeService:
     """Integration service for Claude Code automated incident resolution"""
     
@@ -21,6 +309,7 @@ class ClaudeCodeService:
         self.db = db
         self.api_key = api_key or settings.CLAUDE_CODE_API_KEY
         self.base_url = "https://api.anthropic.com/v1/claude-code"  # Placeholder URL
+        self._headers = {**_API_HEADERS, "Authorization": f"Bearer {self.api_key}"}
         
     async def generate_resolution_plan(
         self, 
@@ -32,6 +321,9 @@ class ClaudeCodeService:
         if not self.api_key:
             raise ValueError("Claude Code API key not configured")
         
+        # Lowercased once; both system extraction and the fallback templates match on it
+        incident_text = _incident_text(incident)
+        
         # Prepare incident context for Claude Code
         incident_context = {
             "title": incident.title,
@@ -39,10 +331,17 @@ class ClaudeCodeService:
             "severity": incident.severity.value,
             "created_at": incident.created_at.isoformat(),
             "tags": incident.tags or [],
-            "affected_systems": self._extract_systems_from_incident(incident),
+            "affected_systems": self._extract_systems_from_incident(incident, incident_text),
             "infrastructure_context": context or {}
         }
         
+        cache_key = _resolution_plan_key(incident_context)
+        cached_plan = _resolution_plan_cache.get(cache_key)
+        if cached_plan is not None:
+            return cached_plan.model_copy(
+                update={"audit_trail": f"Generated by Claude Code for incident {incident.id}"}
+            )
+        
         try:
             # Call Claude Code API for resolution planning
             resolution_plan = await self._call_claude_code_api(
@@ -51,11 +350,14 @@ class ClaudeCodeService:
             )
             
             # Convert Claude Code response to our format
-            return self._convert_claude_response_to_plan(resolution_plan, incident)
+            plan = self._convert_claude_response_to_plan(resolution_plan, incident)
+            # Only API plans are cached; a fallback shouldn't mask the API coming back
+            _resolution_plan_cache[cache_key] = plan
+            return plan
             
         except Exception as e:
             # Fallback to template-based resolution if API fails
-            return await self._generate_fallback_resolution(incident)
+            return await self._generate_fallback_resolution(incident, incident_text)
     
     async def execute_resolution_step(
         self, 
@@ -83,9 +385,10 @@ class ClaudeCodeService:
     async def validate_resolution_plan(
         self, 
         plan: AutoResolutionPlan,
-        infrastructure_context: Dict[str, Any] = None
+        infrastructure_context: Dict[str, Any] = None,
+        fail_fast: bool = False
     ) -> Dict[str, Any]:
-        """Validate resolution plan before execution"""
+        """Validate resolution plan before execution (fail_fast: stop after the first step with errors)"""
         
         validation_results = {
             "valid": True,
@@ -95,20 +398,11 @@ class ClaudeCodeService:
             "estimated_impact": "low"
         }
         
-        # Check for dangerous commands
-        dangerous_patterns = [
-            "rm -rf", "dd if=", "mkfs", "fdisk", 
-            "shutdown", "reboot", "killall",
-            "DROP TABLE", "DELETE FROM", "TRUNCATE",
-            "format", "del /f", "rmdir /s"
-        ]
-        
         for step in plan.steps:
-            command = step.command.lower()
-            
-            # Check for dangerous patterns
-            for pattern in dangerous_patterns:
-                if pattern in command:
+            # Check for dangerous commands (casefolded on both sides, so SQL keywords match too)
+            found = set(_DANGEROUS_COMMAND_RE.findall(step.command.casefold()))
+            for folded, pattern in _DANGEROUS_BY_FOLDED.items():
+                if folded in found:
                     validation_results["errors"].append(
                         f"Step {step.order}: Dangerous command detected - {pattern}"
                     )
@@ -121,12 +415,16 @@ class ClaudeCodeService:
                 )
             
             # Validate command syntax
-            syntax_check = await self._validate_command_syntax(step)
+            syntax_check = self._validate_command_syntax(step)
             if not syntax_check["valid"]:
                 validation_results["errors"].append(
                     f"Step {step.order}: Invalid syntax - {syntax_check['error']}"
                 )
                 validation_results["valid"] = False
+            
+            # The plan is already rejected; the remaining steps can't change that
+            if fail_fast and not validation_results["valid"]:
+                break
         
         # Assess overall risk
         if len(validation_results["errors"]) > 0:
@@ -143,36 +441,31 @@ class ClaudeCodeService:
     ) -> Dict[str, Any]:
         """Make API call to Claude Code service"""
         
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-            "X-API-Version": "2024-01-01"
-        }
-        
         # Note: This is a placeholder implementation
         # The actual Claude Code API may have different endpoints and formats
         
-        async with aiohttp.ClientSession() as session:
-            try:
-                async with session.post(
-                    f"{self.base_url}/{endpoint}",
-                    headers=headers,
-                    json=payload,
-                    timeout=aiohttp.ClientTimeout(total=60)
-                ) as response:
+        session = _get_http_session()
+        try:
+            async with session.post(
+                f"{self.base_url}/{endpoint}",
+                headers=self._headers,
+                # orjson both ways; headers already carry the JSON content type
+                data=orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS),
+                timeout=aiohttp.ClientTimeout(total=60)
+            ) as response:
+                
+                if response.status == 200:
+                    return orjson.loads(await response.read())
+                elif response.status == 401:
+                    raise ValueError("Invalid Claude Code API key")
+                elif response.status == 429:
+                    raise ValueError("Claude Code API rate limit exceeded")
+                else:
+                    error_text = await response.text()
+                    raise ValueError(f"Claude Code API error: {error_text}")
                     
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 401:
-                        raise ValueError("Invalid Claude Code API key")
-                    elif response.status == 429:
-                        raise ValueError("Claude Code API rate limit exceeded")
-                    else:
-                        error_text = await response.text()
-                        raise ValueError(f"Claude Code API error: {error_text}")
-                        
-            except aiohttp.ClientError as e:
-                raise ValueError(f"Claude Code API connection failed: {str(e)}")
+        except aiohttp.ClientError as e:
+            raise ValueError(f"Claude Code API connection failed: {str(e)}")
     
     def _convert_claude_response_to_plan(
         self, 
@@ -209,20 +502,20 @@ class ClaudeCodeService:
             success_criteria=claude_response.get("success_criteria", [])
         )
     
-    async def _generate_fallback_resolution(self, incident: Incident) -> AutoResolutionPlan:
+    async def _generate_fallback_resolution(
+        self,
+        incident: Incident,
+        incident_text: Optional[str] = None
+    ) -> AutoResolutionPlan:
         """Generate basic resolution plan when Claude Code is unavailable"""
         
         # Template-based resolution based on incident type
-        incident_text = (incident.title + " " + (incident.description or "")).lower()
+        incident_text = incident_text or _incident_text(incident)
         
-        if "database" in incident_text or "db" in incident_text:
-            steps = self._get_database_troubleshooting_steps()
-        elif "api" in incident_text or "service" in incident_text:
-            steps = self._get_service_troubleshooting_steps()
-        elif "memory" in incident_text or "cpu" in incident_text:
-            steps = self._get_resource_troubleshooting_steps()
-        else:
-            steps = self._get_generic_troubleshooting_steps()
+        steps = next(
+            (steps for keywords, steps in _FALLBACK_TEMPLATES if any(keyword in incident_text for keyword in keywords)),
+            _GENERIC_TROUBLESHOOTING_STEPS
+        )
         
         return AutoResolutionPlan(
             provider="claude_code",
@@ -230,144 +523,13 @@ class ClaudeCodeService:
             confidence_score=0.6,
             estimated_time_minutes=20,
             risk_level=RiskLevel.MEDIUM,
-            steps=steps,
+            steps=list(steps),
             human_verification_required=True,
             audit_trail=f"Fallback template resolution for incident {incident.id}",
             prerequisites=["kubectl access", "SSH access"],
             success_criteria=["Service health restored", "Metrics return to normal"]
         )
     
-    def _get_database_troubleshooting_steps(self) -> List[ResolutionStep]:
-        """Database-specific troubleshooting steps"""
-        return [
-            ResolutionStep(
-                order=1,
-                description="Check database connection",
-                command="pg_isready -h localhost -p 5432",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="localhost:5432 - accepting connections",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=2,
-                description="Check database disk space",
-                command="df -h /var/lib/postgresql",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Disk usage information",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=3,
-                description="Restart database if needed",
-                command="sudo systemctl restart postgresql",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Service restarted successfully",
-                rollback_command="sudo systemctl stop postgresql",
-                timeout_seconds=60,
-                critical=True
-            )
-        ]
-    
-    def _get_service_troubleshooting_steps(self) -> List[ResolutionStep]:
-        """Service-specific troubleshooting steps"""
-        return [
-            ResolutionStep(
-                order=1,
-                description="Check service health",
-                command="curl -f http://localhost:8080/health",
-                command_type=CommandType.API_CALL,
-                expected_result="HTTP 200 OK",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=2,
-                description="Check service logs",
-                command="tail -n 50 /var/log/service.log",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Recent log entries",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=3,
-                description="Restart service",
-                command="sudo systemctl restart myservice",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Service restarted",
-                rollback_command="sudo systemctl stop myservice",
-                timeout_seconds=60,
-                critical=True
-            )
-        ]
-    
-    def _get_resource_troubleshooting_steps(self) -> List[ResolutionStep]:
-        """Resource usage troubleshooting steps"""
-        return [
-            ResolutionStep(
-                order=1,
-                description="Check system resources",
-                command="free -h && top -bn1 | head -20",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Resource usage information",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=2,
-                description="Identify resource-heavy processes",
-                command="ps aux --sort=-%cpu | head -10",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Top CPU-consuming processes",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=3,
-                description="Scale application if containerized",
-                command="kubectl scale deployment myapp --replicas=3",
-                command_type=CommandType.KUBERNETES,
-                expected_result="Deployment scaled",
-                rollback_command="kubectl scale deployment myapp --replicas=1",
-                timeout_seconds=120,
-                critical=True
-            )
-        ]
-    
-    def _get_generic_troubleshooting_steps(self) -> List[ResolutionStep]:
-        """Generic troubleshooting steps"""
-        return [
-            ResolutionStep(
-                order=1,
-                description="Check system status",
-                command="systemctl status",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="System status information",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=2,
-                description="Check recent logs",
-                command="journalctl -n 50 --no-pager",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Recent system logs",
-                rollback_command=None,
-                timeout_seconds=30
-            ),
-            ResolutionStep(
-                order=3,
-                description="Verify network connectivity",
-                command="ping -c 3 8.8.8.8",
-                command_type=CommandType.CLI_COMMAND,
-                expected_result="Network connectivity confirmed",
-                rollback_command=None,
-                timeout_seconds=30
-            )
-        ]
-    
     async def _execute_cli_command(
         self, 
         step: ResolutionStep, 
@@ -377,29 +539,41 @@ class ClaudeCodeService:
         """Execute CLI command with safety checks"""
         
         if dry_run:
-            return {
-                "status": "success",
-                "message": f"Command simulated: {step.command}",
-                "output": f"[DRY RUN] Would execute: {step.command}",
-                "execution_time": 0.1
-            }
+            return _dry_run_result("Command", step.command, f"[DRY RUN] Would execute: {step.command}")
         
         try:
-            # Security: Use subprocess with shell=False when possible
+            # Security: exec the command directly unless the step opts into shell features;
+            # this also skips spawning /bin/sh for every command
             start_time = asyncio.get_event_loop().time()
             
-            process = await asyncio.create_subprocess_shell(
-                step.command,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=workspace_path
-            )
+            if step.use_shell:
+                process = await asyncio.create_subprocess_shell(
+                    step.command,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=workspace_path,
+                    # Own process group, so a timeout can take down the children too (kubectl, terraform, ...)
+                    start_new_session=True
+                )
+            else:
+                args = shlex.split(step.command)
+                if not args:
+                    raise ValueError("Empty command")
+                process = await asyncio.create_subprocess_exec(
+                    *args,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=workspace_path,
+                    # Own process group, so a timeout can take down the children too (kubectl, terraform, ...)
+                    start_new_session=True
+                )
             
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), 
-                    timeout=step.timeout_seconds
-                )
+                # Both pipes are drained concurrently (so neither fills and stalls the child) with bounded memory
+                async with asyncio.timeout(step.timeout_seconds):
+                    stdout, stderr, _ = await asyncio.gather(
+                        _read_bounded(process.stdout), _read_bounded(process.stderr), process.wait()
+                    )
                 
                 execution_time = asyncio.get_event_loop().time() - start_time
                 
@@ -407,19 +581,19 @@ class ClaudeCodeService:
                     return {
                         "status": "success",
                         "message": "Command executed successfully",
-                        "output": stdout.decode('utf-8'),
+                        "output": stdout.decode('utf-8', errors='replace'),
                         "execution_time": execution_time
                     }
                 else:
                     return {
                         "status": "error",
                         "message": f"Command failed with exit code {process.returncode}",
-                        "output": stderr.decode('utf-8'),
+                        "output": stderr.decode('utf-8', errors='replace'),
                         "execution_time": execution_time
                     }
                     
-            except asyncio.TimeoutError:
-                process.kill()
+            except TimeoutError:
+                await _terminate_process_group(process)
                 return {
                     "status": "timeout",
                     "message": f"Command timed out after {step.timeout_seconds} seconds",
@@ -439,12 +613,7 @@ class ClaudeCodeService:
         """Execute API call"""
         
         if dry_run:
-            return {
-                "status": "success",
-                "message": f"API call simulated: {step.command}",
-                "output": "[DRY RUN] API call would be made",
-                "execution_time": 0.1
-            }
+            return _dry_run_result("API call", step.command, "[DRY RUN] API call would be made")
         
         try:
             # Parse command as HTTP request
@@ -457,31 +626,31 @@ class ClaudeCodeService:
             
             start_time = asyncio.get_event_loop().time()
             
-            async with aiohttp.ClientSession() as session:
-                async with session.request(
-                    method, 
-                    url, 
-                    timeout=aiohttp.ClientTimeout(total=step.timeout_seconds)
-                ) as response:
-                    
-                    execution_time = asyncio.get_event_loop().time() - start_time
-                    response_text = await response.text()
+            session = _get_http_session()
+            async with session.request(
+                method, 
+                url, 
+                timeout=aiohttp.ClientTimeout(total=step.timeout_seconds)
+            ) as response:
+                
+                execution_time = asyncio.get_event_loop().time() - start_time
+                response_text = await response.text()
+                
+                if response.status < 400:
+                    return {
+                        "status": "success",
+                        "message": f"API call successful: {response.status}",
+                        "output": response_text[:1000],  # Limit output
+                        "execution_time": execution_time
+                    }
+                else:
+                    return {
+                        "status": "error",
+                        "message": f"API call failed: {response.status}",
+                        "output": response_text[:1000],
+                        "execution_time": execution_time
+                    }
                     
-                    if response.status < 400:
-                        return {
-                            "status": "success",
-                            "message": f"API call successful: {response.status}",
-                            "output": response_text[:1000],  # Limit output
-                            "execution_time": execution_time
-                        }
-                    else:
-                        return {
-                            "status": "error",
-                            "message": f"API call failed: {response.status}",
-                            "output": response_text[:1000],
-                            "execution_time": execution_time
-                        }
-                        
         except Exception as e:
             return {
                 "status": "error",
@@ -498,12 +667,7 @@ class ClaudeCodeService:
         """Execute Kubernetes command"""
         
         if dry_run:
-            return {
-                "status": "success",
-                "message": f"Kubernetes command simulated: {step.command}",
-                "output": "[DRY RUN] kubectl command would be executed",
-                "execution_time": 0.1
-            }
+            return _dry_run_result("Kubernetes command", step.command, "[DRY RUN] kubectl command would be executed")
         
         # Prepend kubectl if not present
         command = step.command
@@ -519,7 +683,8 @@ class ClaudeCodeService:
             expected_result=step.expected_result,
             rollback_command=step.rollback_command,
             timeout_seconds=step.timeout_seconds,
-            critical=step.critical
+            critical=step.critical,
+            use_shell=step.use_shell
         )
         
         return await self._execute_cli_command(kubectl_step, dry_run, "/tmp")
@@ -533,15 +698,10 @@ class ClaudeCodeService:
         """Execute Terraform command"""
         
         if dry_run:
-            return {
-                "status": "success",
-                "message": f"Terraform command simulated: {step.command}",
-                "output": "[DRY RUN] terraform command would be executed",
-                "execution_time": 0.1
-            }
+            return _dry_run_result("Terraform command", step.command, "[DRY RUN] terraform command would be executed")
         
         # Ensure we're in a terraform workspace
-        if not os.path.exists(os.path.join(workspace_path, "*.tf")):
+        if not _is_terraform_workspace(workspace_path):
             return {
                 "status": "error",
                 "message": "No terraform files found in workspace",
@@ -558,13 +718,14 @@ class ClaudeCodeService:
             expected_result=step.expected_result,
             rollback_command=step.rollback_command,
             timeout_seconds=step.timeout_seconds,
-            critical=step.critical
+            critical=step.critical,
+            use_shell=step.use_shell
         )
         
         return await self._execute_cli_command(terraform_step, dry_run, workspace_path)
     
-    async def _validate_command_syntax(self, step: ResolutionStep) -> Dict[str, Any]:
-        """Validate command syntax without execution"""
+    def _validate_command_syntax(self, step: ResolutionStep) -> Dict[str, Any]:
+        """Validate command syntax without execution (pure string checks, so no coroutine)"""
         
         try:
             if step.command_type == CommandType.CLI_COMMAND:
@@ -592,25 +753,6 @@ class ClaudeCodeService:
         except Exception as e:
             return {"valid": False, "error": f"Validation error: {str(e)}"}
     
-    def _extract_systems_from_incident(self, incident: Incident) -> List[str]:
+    def _extract_systems_from_incident(self, incident: Incident, incident_text: Optional[str] = None) -> List[str]:
         """Extract affected systems from incident data"""
-        
-        systems = []
-        text = (incident.title + " " + (incident.description or "")).lower()
-        
-        # System keywords mapping
-        system_keywords = {
-            'database': ['postgres', 'mysql', 'mongodb', 'redis', 'db'],
-            'api': ['api', 'service', 'endpoint', 'rest'],
-            'web': ['nginx', 'apache', 'web', 'frontend'],
-            'queue': ['kafka', 'rabbitmq', 'sqs', 'queue'],
-            'cache': ['redis', 'memcached', 'cache'],
-            'auth': ['auth', 'login', 'oauth', 'jwt'],
-            'payment': ['payment', 'billing', 'stripe', 'paypal']
-        }
-        
-        for system, keywords in system_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                systems.append(system)
-        
-        return systems if systems else ['general']
\ No newline at end of file
+        return list(_extract_systems(incident_text or _incident_text(incident)))
@@ -1,110 +1,303 @@
 # backend/app/services/deployment_service.py - Production Deployment Service
 import asyncio
+import codecs
 import json
+import re
+import shlex
 import subprocess
-import tempfile
-import shutil
 import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, AsyncGenerator
+from typing import Dict, List, Optional, Any, AsyncGenerator, Awaitable, Callable, Tuple, Union
 from pathlib import Path
-import os
+from collections import deque
+from functools import partial
 import logging
-import docker
+import aiodocker
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import func, select, update
 import redis.asyncio as redis
 
 from app.core.config import settings
 from app.models.incident import Incident
 from app.models.deployment import Deployment, DeploymentStep, DeploymentStatus
-from app.services.websocket_service import WebSocketManager
+from app.services.websocket_service import publish_deployment_events
 
 logger = logging.getLogger(__name__)
 
+# Pause/resume/cancel are published on f"{DEPLOYMENT_CONTROL_CHANNEL}:{deployment_id}" and
+# recorded as paused/cancelled flags in the f"{DEPLOYMENT_STATE_KEY}:{deployment_id}" hash
+DEPLOYMENT_CONTROL_CHANNEL = "deploy:ctrl"
+DEPLOYMENT_STATE_KEY = "deploy:state"
+DEPLOYMENT_STATE_TTL_SECONDS = 3600
+
+# Step rows are committed in batches: after this many finished steps or this many seconds
+STEP_COMMIT_BATCH_SIZE = 10
+STEP_COMMIT_INTERVAL_SECONDS = 2.0
+
+# Events queued per running deployment before the oldest are dropped, and the size up to
+# which consecutive output chunks of a step are merged into one event
+EVENT_QUEUE_MAXSIZE = 1024
+EVENT_OUTPUT_MERGE_CHARS = 64 * 1024
+
+# How long cancel_deployment waits for a cancelled run to return its container
+DEPLOYMENT_CANCEL_TIMEOUT_SECONDS = 10
+
+# Steps per get_deployment_status page, and output characters shown per step
+STATUS_STEPS_PAGE_SIZE = 50
+STATUS_OUTPUT_CHARS = 500
+
+# Independent steps of one deployment running at once
+MAX_PARALLEL_STEPS = 4
+
+# Characters of each stream kept for the step record from its start and from its end;
+# everything is broadcast as it arrives
+OUTPUT_KEEP_CHARS = 32 * 1024
+
+# Commands using any of these (or starting with a bash builtin or keyword) go through bash;
+# the rest are exec'd directly
+_SHELL_SYNTAX = re.compile(r"[|&;<>()$`\\*?\[\]{}~#\n]|^\s*\w+=")
+# `compgen -b -k` in bash 5.2
+_SHELL_BUILTINS = frozenset({
+    "!", ".", ":", "[", "[[", "]]", "alias", "bg", "bind", "break", "builtin", "caller", "case",
+    "cd", "command", "compgen", "complete", "compopt", "continue", "coproc", "declare", "dirs",
+    "disown", "do", "done", "echo", "elif", "else", "enable", "esac", "eval", "exec", "exit",
+    "export", "false", "fc", "fg", "fi", "for", "function", "getopts", "hash", "help",
+    "history", "if", "in", "jobs", "kill", "let", "local", "logout", "mapfile", "popd",
+    "printf", "pushd", "pwd", "read", "readarray", "readonly", "return", "select", "set",
+    "shift", "shopt", "source", "suspend", "test", "then", "time", "times", "trap", "true",
+    "type", "typeset", "ulimit", "umask", "unalias", "unset", "until", "wait", "while", "{", "}"
+})
+
+def _command_argv(command: str, timeout: int) -> List[str]:
+    """argv running a step command under timeout, starting bash only when it needs the shell"""
+    if not _SHELL_SYNTAX.search(command):
+        try:
+            argv = shlex.split(command)
+        except ValueError:
+            argv = []
+        if argv and argv[0] not in _SHELL_BUILTINS:
+            return ["timeout", str(timeout)] + argv
+    
+    return ["timeout", str(timeout), "bash", "-c", command]
+
+# Installs the runner tools in one exec when the image lacks them; a no-op for the
+# prebuilt deploy-runner image, which ships /workspace/.ready
+_RUNNER_SETUP_COMMAND = (
+    "test -f /workspace/.ready || (set -e; "
+    "apt-get update -qq && "
+    "DEBIAN_FRONTEND=noninteractive apt-get install -y -qq ca-certificates curl wget git python3 python3-pip docker.io && "
+    "curl -fsSLo /usr/local/bin/kubectl https://dl.k8s.io/release/v1.29.2/bin/linux/amd64/kubectl && "
+    "chmod +x /usr/local/bin/kubectl && "
+    "pip3 install --quiet requests pyyaml kubernetes && "
+    "mkdir -p /workspace/logs && touch /workspace/.ready)"
+)
+
+class _BoundedOutput:
+    """Start and end of a command's output stream, with the middle dropped as it arrives"""
+    
+    def __init__(self, keep: int = OUTPUT_KEEP_CHARS):
+        self.keep = keep
+        self.head: List[str] = []
+        self.head_size = 0
+        self.tail: deque = deque()
+        self.tail_size = 0
+        self.dropped = 0
+    
+    def append(self, text: str):
+        if self.head_size < self.keep:
+            taken = text[:self.keep - self.head_size]
+            self.head.append(taken)
+            self.head_size += len(taken)
+            text = text[len(taken):]
+            if not text:
+                return
+        
+        self.tail.append(text)
+        self.tail_size += len(text)
+        while self.tail_size > self.keep:
+            excess = self.tail_size - self.keep
+            oldest = self.tail[0]
+            if len(oldest) <= excess:
+                self.tail.popleft()
+                excess = len(oldest)
+            else:
+                self.tail[0] = oldest[excess:]
+            self.tail_size -= excess
+            self.dropped += excess
+    
+    def text(self) -> str:
+        marker = f"\n...[truncated {self.dropped} characters]...\n" if self.dropped else ""
+        return "".join(self.head) + marker + "".join(self.tail)
+
+# One Docker client (and its connection pool to the daemon) per process
+_docker: Optional[aiodocker.Docker] = None
+_docker_lock = asyncio.Lock()
+
+async def get_docker() -> aiodocker.Docker:
+    """Shared Docker client, created on first use"""
+    global _docker
+    if _docker is None:
+        async with _docker_lock:
+            if _docker is None:
+                _docker = aiodocker.Docker()
+    return _docker
+
+async def close_docker():
+    """Close the shared Docker client on application shutdown"""
+    global _docker
+    if _docker is not None:
+        await _docker.close()
+        _docker = None
+
+async def _run_exec(container, cmd: Union[str, List[str]], **kwargs) -> Tuple[int, bytes, bytes]:
+    """Run a command in a container to completion, returning (exit_code, stdout, stderr)"""
+    exec_instance = await container.exec(cmd=cmd, stdout=True, stderr=True, **kwargs)
+    stdout, stderr = [], []
+    async with exec_instance.start(detach=False) as stream:
+        while True:
+            message = await stream.read_out()
+            if message is None:
+                break
+            # Without a TTY the daemon multiplexes the streams: 1 is stdout, 2 is stderr
+            (stdout if message.stream == 1 else stderr).append(message.data)
+    
+    info = await exec_instance.inspect()
+    return info["ExitCode"], b"".join(stdout), b"".join(stderr)
+
+class ContainerPool:
+    """Warm deploy-runner containers, each handed to a single deployment and then replaced
+    
+    A used container is never handed out again: steps run as root and can leave
+    credentials, installed packages or background processes anywhere in it.
+    """
+    
+    def __init__(self, image: str, size: int):
+        self.image = image
+        self.size = size
+        self._idle: asyncio.Queue = asyncio.Queue()
+        # Replacement containers being started in the background
+        self._refills: set = set()
+    
+    async def _run_container(self):
+        """Start an idle runner container with limited privileges"""
+        docker = await get_docker()
+        container = await docker.containers.run(config={
+            "Image": self.image,
+            "Cmd": ["sleep", "infinity"],  # Keep container running
+            "WorkingDir": "/workspace",
+            "Env": ["PYTHONUNBUFFERED=1"],
+            "Labels": {"offcall.role": "deploy-runner"},
+            "HostConfig": {
+                "Memory": 512 * 1024 * 1024,
+                "CpuQuota": 50000,  # 0.5 CPU
+                "SecurityOpt": ["no-new-privileges"],
+                "CapDrop": ["ALL"],
+                "CapAdd": ["CHOWN", "DAC_OVERRIDE", "SETGID", "SETUID"],
+                "NetworkMode": "bridge"  # Isolated network
+            }
+        })
+        
+        exit_code, _, stderr = await _run_exec(container, ["sh", "-c", _RUNNER_SETUP_COMMAND])
+        if exit_code != 0:
+            logger.warning(f"Runner setup failed: {stderr.decode('utf-8', errors='replace')[-500:]}")
+        return container
+    
+    async def _remove_container(self, container):
+        try:
+            await container.delete(force=True)
+        except Exception as e:
+            logger.error(f"Error removing container: {e}")
+    
+    async def start(self):
+        """Fill the pool up to its size"""
+        missing = self.size - self._idle.qsize()
+        results = await asyncio.gather(
+            *(self._run_container() for _ in range(missing)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error(f"Error starting deploy runner container: {result}")
+            else:
+                self._idle.put_nowait(result)
+        logger.info(f"Deploy runner pool warmed: {self._idle.qsize()}/{self.size} containers")
+    
+    async def acquire(self):
+        """Take an idle container, starting a new one if the pool is exhausted"""
+        try:
+            return self._idle.get_nowait()
+        except asyncio.QueueEmpty:
+            logger.warning("Deploy runner pool exhausted, starting a container on demand")
+            return await self._run_container()
+    
+    async def _refill(self):
+        """Start a fresh container for the idle queue"""
+        try:
+            container = await self._run_container()
+        except Exception as e:
+            logger.error(f"Error starting replacement deploy runner container: {e}")
+            return
+        if self._idle.qsize() < self.size:
+            self._idle.put_nowait(container)
+        else:
+            await self._remove_container(container)
+    
+    async def release(self, container):
+        """Remove a used container and start a fresh one in its place"""
+        await self._remove_container(container)
+        
+        if self._idle.qsize() + len(self._refills) < self.size:
+            task = asyncio.create_task(self._refill())
+            # The loop only keeps weak references; hold the task until it finishes
+            self._refills.add(task)
+            task.add_done_callback(self._refills.discard)
+    
+    async def close(self):
+        """Stop pending refills and remove every idle container"""
+        for task in list(self._refills):
+            task.cancel()
+        await asyncio.gather(*self._refills, return_exceptions=True)
+        
+        idle = []
+        while not self._idle.empty():
+            idle.append(self._idle.get_nowait())
+        await asyncio.gather(*(self._remove_container(container) for container in idle))
+
+# Shared by all deployments in this process
+container_pool = ContainerPool(settings.DEPLOY_RUNNER_IMAGE, settings.DEPLOY_CONTAINER_POOL_SIZE)
+
 class SecureExecutionEnvironment:
     """Secure, isolated environment for executing deployment commands"""
     
     def __init__(self, deployment_id: str):
         self.deployment_id = deployment_id
         self.container = None
-        self.temp_dir = None
-        self.docker_client = None
         
     async def __aenter__(self):
-        """Create secure execution environment"""
-        try:
-            # Create temporary directory for deployment files
-            self.temp_dir = tempfile.mkdtemp(prefix=f"deployment_{self.deployment_id}_")
-            
-            # Initialize Docker client
-            self.docker_client = docker.from_env()
-            
-            # Create secure container with limited privileges
-            self.container = self.docker_client.containers.run(
-                image="ubuntu:22.04",
-                name=f"offcall-deploy-{self.deployment_id}",
-                detach=True,
-                stdin_open=True,
-                tty=True,
-                mem_limit="512m",
-                cpu_quota=50000,  # 0.5 CPU
-                security_opt=["no-new-privileges"],
-                cap_drop=["ALL"],
-                cap_add=["CHOWN", "DAC_OVERRIDE", "SETGID", "SETUID"],
-                network_mode="bridge",  # Isolated network
-                volumes={
-                    self.temp_dir: {"bind": "/workspace", "mode": "rw"}
-                },
-                working_dir="/workspace",
-                environment={
-                    "DEPLOYMENT_ID": self.deployment_id,
-                    "PYTHONUNBUFFERED": "1"
-                },
-                command="tail -f /dev/null"  # Keep container running
-            )
-            
-            # Install basic tools in container
-            await self._setup_container_environment()
-            
-            logger.info(f"Secure execution environment created: {self.container.id[:12]}")
-            return self
-            
-        except Exception as e:
-            logger.error(f"Failed to create execution environment: {e}")
-            await self._cleanup()
-            raise
+        """Take a fresh runner container from the pool"""
+        self.container = await container_pool.acquire()
+        logger.info(f"Secure execution environment acquired: {self.container.id[:12]}")
+        return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Cleanup execution environment"""
+        """Hand the runner container back to the pool to be removed"""
         await self._cleanup()
     
-    async def _setup_container_environment(self):
-        """Install required tools in the container"""
-        setup_commands = [
-            "apt-get update -qq",
-            "apt-get install -y -qq curl wget git python3 python3-pip kubectl docker.io",
-            "pip3 install --quiet requests pyyaml kubernetes",
-            "mkdir -p /workspace/logs"
-        ]
-        
-        for cmd in setup_commands:
-            result = self.container.exec_run(cmd, stdout=True, stderr=True)
-            if result.exit_code != 0:
-                logger.warning(f"Setup command failed: {cmd}")
-    
     async def execute_command(
         self, 
         command: str, 
         timeout: int = 300,
-        env_vars: Optional[Dict[str, str]] = None
+        env_vars: Optional[Dict[str, str]] = None,
+        on_output: Optional[Callable[[str], Awaitable[None]]] = None
     ) -> Dict[str, Any]:
-        """Execute command in secure environment with real-time output"""
+        """Execute command in secure environment, passing output chunks to on_output as they arrive"""
         
         if not self.container:
             raise RuntimeError("Execution environment not initialized")
         
+        # Wall-clock times for the record; the duration comes from the loop's monotonic clock
+        loop = asyncio.get_running_loop()
         start_time = datetime.utcnow()
+        started = loop.time()
         
         try:
             # Prepare environment variables
@@ -118,25 +311,42 @@ class SecureExecutionEnvironment:
                 exec_env.update(env_vars)
             
             # Execute command with timeout
-            result = self.container.exec_run(
-                f"timeout {timeout} bash -c '{command}'",
+            exec_instance = await self.container.exec(
+                cmd=_command_argv(command, timeout),
                 stdout=True,
                 stderr=True,
-                stream=False,
                 environment=exec_env
             )
             
-            end_time = datetime.utcnow()
-            duration = (end_time - start_time).total_seconds()
+            # Bounded as it's read; the full output has already been streamed out
+            stdout = _BoundedOutput()
+            stderr = _BoundedOutput()
+            decoders = {
+                1: (codecs.getincrementaldecoder('utf-8')(errors='replace'), stdout),
+                2: (codecs.getincrementaldecoder('utf-8')(errors='replace'), stderr)
+            }
+            async with exec_instance.start(detach=False) as stream:
+                while True:
+                    message = await stream.read_out()
+                    if message is None:
+                        break
+                    decoder, output = decoders.get(message.stream, decoders[2])
+                    text = decoder.decode(message.data)
+                    if not text:
+                        continue
+                    output.append(text)
+                    if on_output:
+                        await on_output(text)
             
+            exit_code = (await exec_instance.inspect())["ExitCode"]
             return {
-                "success": result.exit_code == 0,
-                "exit_code": result.exit_code,
-                "stdout": result.output.decode('utf-8', errors='replace'),
-                "stderr": "",
-                "duration": duration,
-                "start_time": start_time.isoformat(),
-                "end_time": end_time.isoformat()
+                "success": exit_code == 0,
+                "exit_code": exit_code,
+                "stdout": stdout.text(),
+                "stderr": stderr.text(),
+                "duration": loop.time() - started,
+                "start_time": start_time,
+                "end_time": datetime.utcnow()
             }
             
         except Exception as e:
@@ -146,35 +356,118 @@ class SecureExecutionEnvironment:
                 "exit_code": -1,
                 "stdout": "",
                 "stderr": str(e),
-                "duration": (datetime.utcnow() - start_time).total_seconds(),
-                "start_time": start_time.isoformat(),
-                "end_time": datetime.utcnow().isoformat()
+                "duration": loop.time() - started,
+                "start_time": start_time,
+                "end_time": datetime.utcnow()
             }
     
     async def _cleanup(self):
-        """Clean up container and temporary files"""
-        try:
-            if self.container:
-                self.container.stop(timeout=10)
-                self.container.remove()
-                logger.info(f"Container removed: {self.deployment_id}")
-        except Exception as e:
-            logger.error(f"Error removing container: {e}")
+        """Hand the container back to the pool, which removes it and starts a replacement"""
+        if self.container:
+            await container_pool.release(self.container)
+            logger.info(f"Container released: {self.deployment_id}")
+            self.container = None
+
+class _StepCommitBatch:
+    """Commits finished step rows in batches for one deployment run
+    
+    Steps run concurrently but share the run's session, so every use of it goes
+    through the lock.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self.lock = asyncio.Lock()
+        self._loop = asyncio.get_running_loop()
+        self._last_commit_time = self._loop.time()
+        self._uncommitted_steps = 0
+    
+    async def step_finished(self, concurrent: Awaitable):
+        """Count a finished step, committing alongside concurrent when the batch is due"""
+        self._uncommitted_steps += 1
+        if (self._uncommitted_steps < STEP_COMMIT_BATCH_SIZE
+                and self._loop.time() - self._last_commit_time < STEP_COMMIT_INTERVAL_SECONDS):
+            await concurrent
+            return
         
-        try:
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
-                logger.info(f"Temp directory removed: {self.temp_dir}")
-        except Exception as e:
-            logger.error(f"Error removing temp directory: {e}")
+        self._uncommitted_steps = 0
+        async with self.lock:
+            await asyncio.gather(self.db.commit(), concurrent)
+            self._last_commit_time = self._loop.time()
+    
+    async def commit(self):
+        """Commit the steps waiting for a batch now"""
+        self._uncommitted_steps = 0
+        async with self.lock:
+            await self.db.commit()
+            self._last_commit_time = self._loop.time()
+
+class _DeploymentEventQueue:
+    """Events of one running deployment, published in order by a single consumer task
+    
+    Producers never wait on subscribers: consecutive output chunks of a step are merged,
+    and a full queue drops its oldest event.
+    """
+    
+    def __init__(self, publish: Callable[[List[Dict[str, Any]]], Awaitable[None]], maxsize: int = EVENT_QUEUE_MAXSIZE):
+        self._publish = publish
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._events: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._closed = False
+        self._task = asyncio.create_task(self._drain())
+    
+    def put(self, event: Dict[str, Any]):
+        last = self._events[-1] if self._events else None
+        if (last is not None
+                and event.get("type") == "output" and last.get("type") == "output"
+                and event.get("step_id") == last.get("step_id")
+                and len(last["data"]) < EVENT_OUTPUT_MERGE_CHARS):
+            self._events[-1] = {**last, "data": last["data"] + event["data"]}
+        else:
+            if len(self._events) >= self.maxsize:
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(event)
+        self._wakeup.set()
+    
+    async def _drain(self):
+        while True:
+            if not self._events:
+                if self._closed:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            
+            events = list(self._events)
+            self._events.clear()
+            try:
+                await self._publish(events)
+            except Exception as e:
+                logger.error(f"Failed to broadcast {len(events)} events: {e}")
+    
+    async def close(self):
+        """Publish what's still queued, then stop the consumer"""
+        self._closed = True
+        self._wakeup.set()
+        await self._task
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} deployment events on a full queue")
 
 class DeploymentService:
     """Production deployment service with security and monitoring"""
     
     def __init__(self):
         self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
-        self.websocket_manager = WebSocketManager()
         self.active_deployments: Dict[str, asyncio.Task] = {}
+        
+        # Control state of deployments running in this process, fed by _control_listener
+        self._control_state: Dict[str, str] = {}
+        self._resume_events: Dict[str, asyncio.Event] = {}
+        self._event_queues: Dict[str, _DeploymentEventQueue] = {}
+        self._control_listener_task: Optional[asyncio.Task] = None
     
     async def create_deployment(
         self, 
@@ -205,9 +498,19 @@ class DeploymentService:
             db.add(deployment)
             await db.commit()
             
+            # Track control state before the task starts so an early pause isn't missed
+            self._ensure_control_listener()
+            self._control_state[deployment_id] = "running"
+            self._resume_events[deployment_id] = asyncio.Event()
+            self._resume_events[deployment_id].set()
+            self._event_queues[deployment_id] = _DeploymentEventQueue(
+                partial(publish_deployment_events, self.redis, deployment_id)
+            )
+            
             # Start deployment task
             task = asyncio.create_task(
-                self._execute_deployment(deployment_id, solution, db)
+                self._execute_deployment(deployment_id, solution, db),
+                name=f"deployment-{deployment_id}"
             )
             self.active_deployments[deployment_id] = task
             
@@ -226,19 +529,28 @@ class DeploymentService:
     ):
         """Execute deployment with comprehensive monitoring and error handling"""
         
+        deployment = None
         try:
-            # Update deployment status
-            await self._update_deployment_status(deployment_id, DeploymentStatus.RUNNING, db)
+            # Control published before this process subscribed is only in the state hash
+            paused, cancelled = await self._get_deployment_flags(deployment_id)
+            if cancelled or paused:
+                self._apply_control(deployment_id, "cancelled" if cancelled else "paused")
+            
+            # Loaded once; status changes are committed as they happen, step rows in batches
+            deployment = await self._get_deployment(deployment_id, db)
+            if not deployment:
+                raise ValueError(f"Deployment not found: {deployment_id}")
+            started = asyncio.get_running_loop().time()
+            
+            await self._set_deployment_status(deployment, DeploymentStatus.RUNNING, db)
             
             # Extract deployment information
-            commands = solution.get("commands", [])
-            steps = solution.get("steps", [])
+            step_specs = self._plan_steps(solution)
             provider = solution.get("provider", "unknown")
             
             async with SecureExecutionEnvironment(deployment_id) as exec_env:
                 
-                total_steps = len(commands)
-                completed_steps = 0
+                total_steps = len(step_specs)
                 
                 # Send deployment started event
                 await self._broadcast_event(deployment_id, {
@@ -246,129 +558,21 @@ class DeploymentService:
                     "deployment_id": deployment_id,
                     "provider": provider,
                     "total_steps": total_steps,
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": datetime.utcnow()
                 })
                 
-                # Execute each deployment step
-                for step_index, (command, description) in enumerate(zip(commands, steps)):
-                    
-                    # Check if deployment was cancelled
-                    if await self._is_deployment_cancelled(deployment_id):
-                        await self._update_deployment_status(deployment_id, DeploymentStatus.CANCELLED, db)
-                        return
-                    
-                    # Check if deployment is paused
-                    while await self._is_deployment_paused(deployment_id):
-                        await asyncio.sleep(1)
-                        if await self._is_deployment_cancelled(deployment_id):
-                            return
-                    
-                    step_id = f"step_{step_index}"
-                    
-                    # Create deployment step record
-                    step_record = DeploymentStep(
-                        id=str(uuid.uuid4()),
-                        deployment_id=deployment_id,
-                        step_index=step_index,
-                        command=command,
-                        description=description,
-                        status="running",
-                        started_at=datetime.utcnow()
-                    )
-                    
-                    db.add(step_record)
-                    await db.commit()
-                    
-                    # Broadcast step started
-                    await self._broadcast_event(deployment_id, {
-                        "type": "step_started",
-                        "step_id": step_id,
-                        "step_index": step_index,
-                        "command": command,
-                        "description": description,
-                        "start_time": datetime.utcnow().isoformat()
-                    })
-                    
-                    # Execute the command
-                    try:
-                        # Enhance command with proper context
-                        enhanced_command = await self._enhance_command(command, deployment_id)
-                        
-                        result = await exec_env.execute_command(
-                            enhanced_command,
-                            timeout=300,  # 5 minutes per step
-                            env_vars={
-                                "STEP_INDEX": str(step_index),
-                                "STEP_DESCRIPTION": description
-                            }
-                        )
-                        
-                        # Update step record
-                        step_record.status = "completed" if result["success"] else "failed"
-                        step_record.exit_code = result["exit_code"]
-                        step_record.output = result["stdout"]
-                        step_record.error_output = result["stderr"]
-                        step_record.completed_at = datetime.utcnow()
-                        step_record.duration = result["duration"]
-                        
-                        await db.commit()
-                        
-                        # Broadcast step result
-                        event_type = "step_completed" if result["success"] else "step_failed"
-                        await self._broadcast_event(deployment_id, {
-                            "type": event_type,
-                            "step_id": step_id,
-                            "step_index": step_index,
-                            "success": result["success"],
-                            "exit_code": result["exit_code"],
-                            "output": result["stdout"][:1000],  # Limit output size
-                            "error": result["stderr"][:1000] if result["stderr"] else None,
-                            "duration": result["duration"],
-                            "start_time": result["start_time"],
-                            "end_time": result["end_time"]
-                        })
-                        
-                        # Stream output if available
-                        if result["stdout"]:
-                            await self._broadcast_event(deployment_id, {
-                                "type": "output",
-                                "data": result["stdout"]
-                            })
-                        
-                        if not result["success"]:
-                            # Step failed - determine if we should continue
-                            if await self._should_fail_fast(deployment_id, step_index):
-                                raise Exception(f"Step {step_index} failed: {result['stderr']}")
-                            else:
-                                logger.warning(f"Step {step_index} failed but continuing: {result['stderr']}")
-                        
-                        completed_steps += 1
-                        
-                    except Exception as step_error:
-                        logger.error(f"Step {step_index} execution error: {step_error}")
-                        
-                        step_record.status = "failed"
-                        step_record.error_output = str(step_error)
-                        step_record.completed_at = datetime.utcnow()
-                        await db.commit()
-                        
-                        await self._broadcast_event(deployment_id, {
-                            "type": "step_failed",
-                            "step_id": step_id,
-                            "step_index": step_index,
-                            "error": str(step_error),
-                            "end_time": datetime.utcnow().isoformat()
-                        })
-                        
-                        # Fail the entire deployment
-                        raise step_error
+                # Execute the steps, independent ones in parallel
+                completed_steps = await self._run_step_graph(
+                    deployment_id, deployment, step_specs, exec_env, db
+                )
+                if completed_steps is None:
+                    return
                 
                 # All steps completed successfully
-                await self._update_deployment_status(deployment_id, DeploymentStatus.COMPLETED, db)
+                await self._set_deployment_status(deployment, DeploymentStatus.COMPLETED, db)
                 
                 # Calculate total duration
-                deployment_record = await self._get_deployment(deployment_id, db)
-                total_duration = (datetime.utcnow() - deployment_record.created_at).total_seconds()
+                total_duration = asyncio.get_running_loop().time() - started
                 
                 await self._broadcast_event(deployment_id, {
                     "type": "deployment_completed",
@@ -376,7 +580,7 @@ class DeploymentService:
                     "completed_steps": completed_steps,
                     "total_steps": total_steps,
                     "total_duration": f"{total_duration:.1f}s",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": datetime.utcnow()
                 })
                 
                 logger.info(f"Deployment completed successfully: {deployment_id}")
@@ -384,43 +588,267 @@ class DeploymentService:
         except Exception as e:
             logger.error(f"Deployment failed: {deployment_id}, error: {e}")
             
-            await self._update_deployment_status(deployment_id, DeploymentStatus.FAILED, db)
+            if deployment is not None:
+                await self._set_deployment_status(deployment, DeploymentStatus.FAILED, db)
             
             await self._broadcast_event(deployment_id, {
                 "type": "deployment_failed",
                 "deployment_id": deployment_id,
                 "error": str(e),
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.utcnow()
             })
             
         finally:
+            # Final status and steps still waiting for a batch commit
+            try:
+                await db.commit()
+            except Exception as e:
+                logger.error(f"Failed to commit deployment steps: {deployment_id}, error: {e}")
+            
             # Clean up active deployment tracking
             if deployment_id in self.active_deployments:
                 del self.active_deployments[deployment_id]
+            self._control_state.pop(deployment_id, None)
+            self._resume_events.pop(deployment_id, None)
+            
+            # Flush the run's events; later ones (e.g. cancellation) are published directly
+            event_queue = self._event_queues.pop(deployment_id, None)
+            if event_queue:
+                await event_queue.close()
     
-    async def _enhance_command(self, command: str, deployment_id: str) -> str:
-        """Enhance command with proper context and safety checks"""
+    def _plan_steps(self, solution: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Step specs (command, description, depends_on) for a solution
         
-        # Add safety prefixes for different command types
-        if command.startswith("kubectl"):
-            return f"echo 'Executing kubectl command...' && {command}"
-        elif command.startswith("docker"):
-            return f"echo 'Executing docker command...' && {command}"
-        elif "rm -rf" in command or "rm -r" in command:
-            return f"echo 'WARNING: Destructive command detected' && {command}"
+        Steps are either a list of dicts carrying their own dependencies or the flat
+        commands/steps lists. A step without depends_on waits for the step before it,
+        so solutions without any dependency metadata run linearly.
+        """
+        steps = solution.get("steps", [])
+        if steps and all(isinstance(step, dict) for step in steps):
+            specs = [
+                {
+                    "command": step["command"],
+                    "description": step.get("description", ""),
+                    "depends_on": step.get("depends_on")
+                }
+                for step in steps
+            ]
         else:
-            return f"echo 'Executing: {command}' && {command}"
+            specs = [
+                {"command": command, "description": description, "depends_on": None}
+                for command, description in zip(solution.get("commands", []), steps)
+            ]
+        
+        for step_index, spec in enumerate(specs):
+            if spec["depends_on"] is None:
+                spec["depends_on"] = [step_index - 1] if step_index else []
+            for dependency in spec["depends_on"]:
+                if not 0 <= dependency < len(specs) or dependency == step_index:
+                    raise ValueError(f"Step {step_index} has an invalid dependency: {dependency}")
+        
+        return specs
+    
+    async def _run_step_graph(
+        self,
+        deployment_id: str,
+        deployment: Deployment,
+        step_specs: List[Dict[str, Any]],
+        exec_env: SecureExecutionEnvironment,
+        db: AsyncSession
+    ) -> Optional[int]:
+        """Run steps as their dependencies complete, up to MAX_PARALLEL_STEPS at once
+        
+        Returns the number of completed steps, or None if the deployment was cancelled.
+        A step failure cancels the steps still running and propagates.
+        """
+        batch = _StepCommitBatch(db)
+        
+        dependents: Dict[int, List[int]] = {step_index: [] for step_index in range(len(step_specs))}
+        waiting_on: Dict[int, int] = {}
+        for step_index, spec in enumerate(step_specs):
+            waiting_on[step_index] = len(set(spec["depends_on"]))
+            for dependency in set(spec["depends_on"]):
+                dependents[dependency].append(step_index)
+        
+        ready = deque(step_index for step_index, count in waiting_on.items() if count == 0)
+        running: Dict[asyncio.Task, int] = {}
+        completed_steps = 0
+        
+        try:
+            while ready or running:
+                while ready and len(running) < MAX_PARALLEL_STEPS:
+                    # Check if deployment was cancelled
+                    if self._is_deployment_cancelled(deployment_id):
+                        async with batch.lock:
+                            await self._set_deployment_status(deployment, DeploymentStatus.CANCELLED, db)
+                        return None
+                    
+                    # Wait out a pause; the listener sets the event on resume and on cancel.
+                    # Finished steps are committed first so the transaction isn't held open meanwhile
+                    if self._is_deployment_paused(deployment_id):
+                        await batch.commit()
+                        await self._resume_events[deployment_id].wait()
+                        if self._is_deployment_cancelled(deployment_id):
+                            return None
+                    
+                    step_index = ready.popleft()
+                    spec = step_specs[step_index]
+                    task = asyncio.create_task(self._run_step(
+                        deployment_id, step_index, spec["command"], spec["description"], exec_env, batch
+                    ))
+                    running[task] = step_index
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_index = running.pop(task)
+                    task.result()  # Raises if the step failed the deployment
+                    completed_steps += 1
+                    for dependent in dependents[step_index]:
+                        waiting_on[dependent] -= 1
+                        if waiting_on[dependent] == 0:
+                            ready.append(dependent)
+            
+            if completed_steps < len(step_specs):
+                raise ValueError("Step dependencies contain a cycle")
+            
+            return completed_steps
+            
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running, return_exceptions=True)
+    
+    async def _run_step(
+        self,
+        deployment_id: str,
+        step_index: int,
+        command: str,
+        description: str,
+        exec_env: SecureExecutionEnvironment,
+        batch: _StepCommitBatch
+    ):
+        """Execute one step, recording and broadcasting its progress"""
+        
+        step_id = f"step_{step_index}"
+        started_at = datetime.utcnow()
+        
+        # Create deployment step record
+        step_record = DeploymentStep(
+            id=str(uuid.uuid4()),
+            deployment_id=deployment_id,
+            step_index=step_index,
+            command=command,
+            description=description,
+            status="running",
+            started_at=started_at
+        )
+        
+        # Flushed with the next batch commit
+        async with batch.lock:
+            batch.db.add(step_record)
+        
+        # Broadcast step started while the command launches
+        step_started = asyncio.create_task(self._broadcast_event(deployment_id, {
+            "type": "step_started",
+            "step_id": step_id,
+            "step_index": step_index,
+            "command": command,
+            "description": description,
+            "warning": self._command_warning(command),
+            "start_time": started_at
+        }))
+        
+        # Execute the command
+        try:
+            async def stream_output(text: str):
+                # Keep output behind the step_started event
+                await step_started
+                await self._broadcast_event(deployment_id, {
+                    "type": "output",
+                    "step_id": step_id,
+                    "data": text
+                })
+            
+            result = await exec_env.execute_command(
+                command,
+                timeout=300,  # 5 minutes per step
+                env_vars={
+                    "STEP_INDEX": str(step_index),
+                    "STEP_DESCRIPTION": description
+                },
+                on_output=stream_output
+            )
+            await step_started
+            
+            # Update step record
+            async with batch.lock:
+                step_record.status = "completed" if result["success"] else "failed"
+                step_record.exit_code = result["exit_code"]
+                step_record.output = result["stdout"]
+                step_record.error_output = result["stderr"]
+                step_record.completed_at = result["end_time"]
+                step_record.duration = result["duration"]
+            
+            # Broadcast step result, alongside the batch commit if one is due
+            event_type = "step_completed" if result["success"] else "step_failed"
+            await batch.step_finished(self._broadcast_event(deployment_id, {
+                "type": event_type,
+                "step_id": step_id,
+                "step_index": step_index,
+                "success": result["success"],
+                "exit_code": result["exit_code"],
+                "output": result["stdout"][:1000],  # Limit output size
+                "error": result["stderr"][:1000] if result["stderr"] else None,
+                "duration": result["duration"],
+                "start_time": result["start_time"],
+                "end_time": result["end_time"]
+            }))
+            
+            if not result["success"]:
+                # Step failed - determine if we should continue
+                if await self._should_fail_fast(deployment_id, step_index):
+                    raise Exception(f"Step {step_index} failed: {result['stderr']}")
+                else:
+                    logger.warning(f"Step {step_index} failed but continuing: {result['stderr']}")
+            
+        except Exception as step_error:
+            logger.error(f"Step {step_index} execution error: {step_error}")
+            failed_at = datetime.utcnow()
+            
+            async with batch.lock:
+                step_record.status = "failed"
+                step_record.error_output = str(step_error)
+                step_record.completed_at = failed_at
+            
+            await step_started
+            await self._broadcast_event(deployment_id, {
+                "type": "step_failed",
+                "step_id": step_id,
+                "step_index": step_index,
+                "error": str(step_error),
+                "end_time": failed_at
+            })
+            
+            # Fail the entire deployment
+            raise step_error
+    
+    def _command_warning(self, command: str) -> Optional[str]:
+        """Warning shown with the step_started event for risky commands"""
+        if "rm -rf" in command or "rm -r" in command:
+            return "Destructive command detected"
+        return None
     
     async def pause_deployment(self, deployment_id: str, db: AsyncSession) -> bool:
         """Pause a running deployment"""
         try:
-            await self.redis.set(f"deployment:{deployment_id}:paused", "true", ex=3600)
+            await self._publish_control(deployment_id, "paused")
             await self._update_deployment_status(deployment_id, DeploymentStatus.PAUSED, db)
             
             await self._broadcast_event(deployment_id, {
                 "type": "deployment_paused",
                 "deployment_id": deployment_id,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.utcnow()
             })
             
             return True
@@ -431,13 +859,13 @@ class DeploymentService:
     async def resume_deployment(self, deployment_id: str, db: AsyncSession) -> bool:
         """Resume a paused deployment"""
         try:
-            await self.redis.delete(f"deployment:{deployment_id}:paused")
+            await self._publish_control(deployment_id, "running")
             await self._update_deployment_status(deployment_id, DeploymentStatus.RUNNING, db)
             
             await self._broadcast_event(deployment_id, {
                 "type": "deployment_resumed",
                 "deployment_id": deployment_id,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.utcnow()
             })
             
             return True
@@ -448,20 +876,17 @@ class DeploymentService:
     async def cancel_deployment(self, deployment_id: str, db: AsyncSession) -> bool:
         """Cancel a running deployment"""
         try:
-            await self.redis.set(f"deployment:{deployment_id}:cancelled", "true", ex=3600)
+            await self._publish_control(deployment_id, "cancelled")
             
-            # Cancel the running task
-            if deployment_id in self.active_deployments:
-                task = self.active_deployments[deployment_id]
-                task.cancel()
-                del self.active_deployments[deployment_id]
+            # Cancel the running task and let it return its container
+            await self._stop_deployment_task(deployment_id)
             
             await self._update_deployment_status(deployment_id, DeploymentStatus.CANCELLED, db)
             
             await self._broadcast_event(deployment_id, {
                 "type": "deployment_cancelled",
                 "deployment_id": deployment_id,
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": datetime.utcnow()
             })
             
             return True
@@ -469,6 +894,37 @@ class DeploymentService:
             logger.error(f"Failed to cancel deployment {deployment_id}: {e}")
             return False
     
+    async def _stop_deployment_task(self, deployment_id: str):
+        """Cancel a deployment's task in this process and wait for it to unwind"""
+        task = self.active_deployments.pop(deployment_id, None)
+        if task is None or task.done():
+            return
+        
+        task.cancel()
+        _, pending = await asyncio.wait({task}, timeout=DEPLOYMENT_CANCEL_TIMEOUT_SECONDS)
+        if pending:
+            logger.error(f"Deployment {deployment_id} did not finish cleanup after cancellation")
+        
+        # A run cancelled before it started never reached its own cleanup
+        self._control_state.pop(deployment_id, None)
+        self._resume_events.pop(deployment_id, None)
+        event_queue = self._event_queues.pop(deployment_id, None)
+        if event_queue:
+            await event_queue.close()
+    
+    async def close(self):
+        """Cancel the deployments running in this process and wait for their cleanup"""
+        await asyncio.gather(*(
+            self._stop_deployment_task(deployment_id) for deployment_id in list(self.active_deployments)
+        ))
+        
+        if self._control_listener_task and not self._control_listener_task.done():
+            self._control_listener_task.cancel()
+            try:
+                await self._control_listener_task
+            except asyncio.CancelledError:
+                pass
+    
     async def rollback_deployment(self, deployment_id: str, db: AsyncSession) -> str:
         """Create and execute rollback deployment"""
         
@@ -531,20 +987,45 @@ class DeploymentService:
             "risk_level": "low"
         }
     
-    async def get_deployment_status(self, deployment_id: str, db: AsyncSession) -> Optional[Dict[str, Any]]:
-        """Get comprehensive deployment status"""
+    async def get_deployment_status(
+        self,
+        deployment_id: str,
+        db: AsyncSession,
+        limit: int = STATUS_STEPS_PAGE_SIZE,
+        after: Optional[int] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Get deployment status with a page of its steps
+        
+        Steps come in index order; pass a page's next_after as after to get the next one.
+        """
         
         deployment = await self._get_deployment(deployment_id, db)
         if not deployment:
             return None
         
-        # Get deployment steps
-        steps_result = await db.execute(
-            select(DeploymentStep)
+        # Only the listed columns, with output truncated by Postgres; one extra row tells
+        # whether another page follows
+        steps_query = (
+            select(
+                DeploymentStep.step_index,
+                DeploymentStep.command,
+                DeploymentStep.description,
+                DeploymentStep.status,
+                DeploymentStep.duration,
+                DeploymentStep.exit_code,
+                func.substr(DeploymentStep.output, 1, STATUS_OUTPUT_CHARS).label("output"),
+                func.substr(DeploymentStep.error_output, 1, STATUS_OUTPUT_CHARS).label("error")
+            )
             .where(DeploymentStep.deployment_id == deployment_id)
             .order_by(DeploymentStep.step_index)
+            .limit(limit + 1)
         )
-        steps = steps_result.scalars().all()
+        if after is not None:
+            steps_query = steps_query.where(DeploymentStep.step_index > after)
+        
+        steps = (await db.execute(steps_query)).all()
+        has_more = len(steps) > limit
+        steps = steps[:limit]
         
         return {
             "id": deployment.id,
@@ -561,11 +1042,12 @@ class DeploymentService:
                     "status": step.status,
                     "duration": step.duration,
                     "exit_code": step.exit_code,
-                    "output": step.output[:500] if step.output else None,  # Truncate output
-                    "error": step.error_output[:500] if step.error_output else None
+                    "output": step.output or None,
+                    "error": step.error or None
                 }
                 for step in steps
-            ]
+            ],
+            "next_after": steps[-1].step_index if has_more else None
         }
     
     # Helper methods
@@ -578,6 +1060,16 @@ class DeploymentService:
         )
         await db.commit()
     
+    async def _set_deployment_status(self, deployment: Deployment, status: DeploymentStatus, db: AsyncSession):
+        """Update a loaded deployment's status and commit it right away
+        
+        Committing immediately releases the row lock, so pause/resume/cancel updating the
+        same row from another session never wait on a running deployment.
+        """
+        deployment.status = status
+        deployment.updated_at = datetime.utcnow()
+        await db.commit()
+    
     async def _get_deployment(self, deployment_id: str, db: AsyncSession) -> Optional[Deployment]:
         """Get deployment by ID"""
         result = await db.execute(
@@ -586,21 +1078,82 @@ class DeploymentService:
         return result.scalar_one_or_none()
     
     async def _broadcast_event(self, deployment_id: str, event: Dict[str, Any]):
-        """Broadcast event to WebSocket subscribers"""
+        """Publish event to the deployment's stream, which WebSocket subscribers read
+        
+        Events of a run in this process go through its queue, so this never waits on Redis.
+        """
+        event_queue = self._event_queues.get(deployment_id)
+        if event_queue:
+            event_queue.put(event)
+            return
+        
         try:
-            await self.websocket_manager.broadcast_to_deployment(deployment_id, event)
+            await publish_deployment_events(self.redis, deployment_id, [event])
         except Exception as e:
             logger.error(f"Failed to broadcast event: {e}")
     
-    async def _is_deployment_cancelled(self, deployment_id: str) -> bool:
+    async def _publish_control(self, deployment_id: str, state: str):
+        """Tell whichever process runs the deployment to pause, resume or cancel it"""
+        # A run in this process reacts now; the listener's copy of the message is a no-op
+        self._apply_control(deployment_id, state)
+        
+        state_key = f"{DEPLOYMENT_STATE_KEY}:{deployment_id}"
+        flag = ("cancelled", "1") if state == "cancelled" else ("paused", "1" if state == "paused" else "0")
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(state_key, *flag)
+            pipe.expire(state_key, DEPLOYMENT_STATE_TTL_SECONDS)
+            pipe.publish(f"{DEPLOYMENT_CONTROL_CHANNEL}:{deployment_id}", state)
+            await pipe.execute()
+    
+    async def _get_deployment_flags(self, deployment_id: str) -> Tuple[bool, bool]:
+        """(paused, cancelled) from the deployment's state hash, in one round trip"""
+        paused, cancelled = await self.redis.hmget(f"{DEPLOYMENT_STATE_KEY}:{deployment_id}", "paused", "cancelled")
+        return paused == "1", cancelled == "1"
+    
+    def _apply_control(self, deployment_id: str, state: str):
+        resume_event = self._resume_events.get(deployment_id)
+        if resume_event is None:
+            return  # Running in another process
+        if self._control_state.get(deployment_id) == "cancelled":
+            return  # Cancellation is final
+        
+        self._control_state[deployment_id] = state
+        if state == "paused":
+            resume_event.clear()
+        else:
+            resume_event.set()
+    
+    def _ensure_control_listener(self):
+        if self._control_listener_task is None or self._control_listener_task.done():
+            self._control_listener_task = asyncio.create_task(self._control_listener())
+    
+    async def _control_listener(self):
+        """Apply published control messages to the deployments running in this process"""
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.psubscribe(f"{DEPLOYMENT_CONTROL_CHANNEL}:*")
+                try:
+                    async for message in pubsub.listen():
+                        if message["type"] != "pmessage":
+                            continue
+                        
+                        deployment_id = message["channel"].rsplit(":", 1)[1]
+                        self._apply_control(deployment_id, message["data"])
+                finally:
+                    await pubsub.close()
+                    
+            except Exception as e:
+                logger.error(f"Deployment control listener error: {e}")
+                await asyncio.sleep(1)
+    
+    def _is_deployment_cancelled(self, deployment_id: str) -> bool:
         """Check if deployment was cancelled"""
-        result = await self.redis.get(f"deployment:{deployment_id}:cancelled")
-        return result == "true"
+        return self._control_state.get(deployment_id) == "cancelled"
     
-    async def _is_deployment_paused(self, deployment_id: str) -> bool:
+    def _is_deployment_paused(self, deployment_id: str) -> bool:
         """Check if deployment is paused"""
-        result = await self.redis.get(f"deployment:{deployment_id}:paused")
-        return result == "true"
+        return self._control_state.get(deployment_id) == "paused"
     
     async def _should_fail_fast(self, deployment_id: str, step_index: int) -> bool:
         """Determine if deployment should fail fast on step failure"""
@@ -0,0 +1,59 @@
+# backend/app/services/embedding_service.py - Incident text embeddings for similarity search
+import aiohttp
+import logging
+from typing import List
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512  # Must match incidents.embedding vector(512)
+
+class EmbeddingService:
+    """Batched OpenAI embeddings for incident similarity search"""
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key or settings.OPENAI_API_KEY
+        self.base_url = "https://api.openai.com/v1/embeddings"
+
+    @staticmethod
+    def incident_text(title: str, description: str = None) -> str:
+        """Text that represents an incident in embedding space"""
+        return f"{title}\n{description or ''}".strip()
+
+    async def embed(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts in a single API call (the embeddings endpoint batches natively)"""
+
+        if not texts:
+            return []
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not configured")
+
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": EMBEDDING_MODEL,
+            "input": texts,
+            "dimensions": EMBEDDING_DIMENSIONS
+        }
+
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                self.base_url,
+                headers=headers,
+                json=payload,
+                timeout=aiohttp.ClientTimeout(total=30)
+            ) as response:
+                if response.status != 200:
+                    error_text = await response.text()
+                    raise Exception(f"OpenAI embeddings error {response.status}: {error_text}")
+
+                data = await response.json()
+
+        # Results carry their input index; don't rely on response ordering
+        vectors = [None] * len(texts)
+        for item in data["data"]:
+            vectors[item["index"]] = item["embedding"]
+        return vectors
@@ -2,14 +2,21 @@
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 import uuid
+import logging
+from app.database import SessionLocal
 from app.models.incident import Incident
+from app.services.embedding_service import EmbeddingService
+
+logger = logging.getLogger(__name__)
 
 class IncidentService:
     """Service for incident management operations"""
     
     def __init__(self, db: AsyncSession):
         self.db = db
+        self.embedding_service = EmbeddingService()
     
     async def create_incident_from_webhook(
         self, 
@@ -73,16 +80,58 @@ class IncidentService:
         organization_id: str,
         limit: int = 5
     ) -> List[Incident]:
-        """Find similar historical incidents for pattern analysis"""
+        """Find similar historical incidents by embedding cosine distance (HNSW index)"""
+        
+        try:
+            # embedding is deferred; select it explicitly rather than lazy-loading in async
+            target_embedding = await self.db.scalar(
+                select(Incident.embedding).where(Incident.id == incident.id)
+            )
+            if target_embedding is None:
+                vectors = await self.embed_incidents([incident])
+                if not vectors:
+                    return []
+                target_embedding = vectors[0]
+            
+            result = await self.db.execute(
+                select(Incident).where(
+                    Incident.organization_id == organization_id,
+                    Incident.id != incident.id,
+                    Incident.embedding.isnot(None)
+                ).order_by(
+                    Incident.embedding.cosine_distance(target_embedding)
+                ).limit(limit)
+            )
+            return list(result.scalars().all())
+        except Exception as e:
+            logger.warning(f"Similar incident search failed for {incident.id}: {e}")
+            return []
+    
+    async def embed_incidents(self, incidents: List[Incident]) -> List[List[float]]:
+        """Compute embeddings for the given incidents in a single batched API call
+        
+        Sets and flushes each incident's embedding, leaving the commit to the caller.
+        Returns the vectors in input order, or [] if embedding failed.
+        """
         
-        # Mock implementation - replace with actual similarity search
-        similar_incidents = []
+        pending = list(incidents)
+        if not pending:
+            return []
         
-        # Simple keyword-based similarity
-        keywords = self._extract_keywords(incident.title + " " + (incident.description or ""))
+        try:
+            vectors = await self.embedding_service.embed([
+                EmbeddingService.incident_text(incident.title, incident.description)
+                for incident in pending
+            ])
+        except Exception as e:
+            logger.warning(f"Incident embedding failed: {e}")
+            return []
         
-        # Would typically use vector similarity or keyword matching
-        return similar_incidents
+        for incident, vector in zip(pending, vectors):
+            incident.embedding = vector
+        await self.db.flush()
+        
+        return vectors
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from incident text"""
@@ -131,3 +180,16 @@ class IncidentService:
                 "LOW": 7
             }
         }
+
+
+async def embed_new_incidents(incident_ids: List[str]) -> None:
+    """Embed newly created incidents in their own session, off the request/creator path"""
+    try:
+        async with SessionLocal() as db:
+            incidents = (await db.execute(
+                select(Incident).where(Incident.id.in_(incident_ids))
+            )).scalars().all()
+            if await IncidentService(db).embed_incidents(incidents):
+                await db.commit()
+    except Exception as e:
+        logger.error(f"Failed to embed incidents {incident_ids}: {e}")
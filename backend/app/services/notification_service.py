@@ -1,5 +1,7 @@
 # backend/app/services/notification_service.py
-from typing import List, Optional
+import logging
+from functools import lru_cache
+from typing import List, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
@@ -11,25 +13,32 @@ from app.services.email_service import EmailService
 from app.services.slack_service import SlackService
 from app.services.sms_service import SMSService
 
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _channel_services() -> Tuple[EmailService, Optional[SlackService], Optional[SMSService]]:
+    """Build the delivery clients once per process so their HTTP connection pools are reused"""
+    email_service = EmailService()
+    try:
+        slack_service = SlackService()
+    except Exception as e:
+        logger.warning(f"Slack not configured: {e}")
+        slack_service = None
+    
+    try:
+        sms_service = SMSService()
+    except Exception as e:
+        logger.warning(f"SMS not configured: {e}")
+        sms_service = None
+    
+    return email_service, slack_service, sms_service
+
 class NotificationService:
     def __init__(self, db: AsyncSession):
         self.db = db
-        self.email_service = EmailService()
-        try:
-            self.slack_service = SlackService()
-            self.slack_enabled = True
-        except Exception as e:
-            print(f"Slack not configured: {e}")
-            self.slack_service = None
-            self.slack_enabled = False
-        
-        try:
-            self.sms_service = SMSService()
-            self.sms_enabled = True
-        except Exception as e:
-            print(f"SMS not configured: {e}")
-            self.sms_service = None
-            self.sms_enabled = False
+        self.email_service, self.slack_service, self.sms_service = _channel_services()
+        self.slack_enabled = self.slack_service is not None
+        self.sms_enabled = self.sms_service is not None
 
     async def notify_incident_created(self, incident: Incident) -> bool:
         """Notify relevant users when incident is created"""
@@ -69,11 +78,11 @@ class NotificationService:
                     if await self.sms_service.send_critical_alert(user, incident):
                         sms_success_count += 1
 
-            print(f"Notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}, SMS: {sms_success_count}")
+            logger.info(f"Notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}, SMS: {sms_success_count}")
             return email_success_count > 0 or slack_success or sms_success_count > 0
 
         except Exception as e:
-            print(f"Notification error: {e}")
+            logger.error(f"Notification error: {e}")
             return False
 
     async def notify_incident_acknowledged(self, incident: Incident, acknowledged_by: User) -> bool:
@@ -106,11 +115,11 @@ class NotificationService:
                     "#incidents", incident, "acknowledged", acknowledged_by
                 )
 
-            print(f"Acknowledgment notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}")
+            logger.info(f"Acknowledgment notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}")
             return email_success_count > 0 or slack_success
 
         except Exception as e:
-            print(f"Acknowledgment notification error: {e}")
+            logger.error(f"Acknowledgment notification error: {e}")
             return False
 
     async def notify_incident_resolved(self, incident: Incident, resolved_by: User) -> bool:
@@ -143,11 +152,11 @@ class NotificationService:
                     "#incidents", incident, "resolved", resolved_by
                 )
 
-            print(f"Resolution notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}")
+            logger.info(f"Resolution notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}")
             return email_success_count > 0 or slack_success
 
         except Exception as e:
-            print(f"Resolution notification error: {e}")
+            logger.error(f"Resolution notification error: {e}")
             return False
 
     async def notify_escalation(self, incident: Incident, escalation_level: int) -> bool:
@@ -200,9 +209,9 @@ class NotificationService:
                     if await self.sms_service.send_escalation_sms(user, incident, escalation_level):
                         sms_success_count += 1
 
-            print(f"Escalation notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}, SMS: {sms_success_count}")
+            logger.info(f"Escalation notifications sent - Email: {email_success_count}/{len(users_to_notify)}, Slack: {slack_success}, SMS: {sms_success_count}")
             return email_success_count > 0 or slack_success or sms_success_count > 0
 
         except Exception as e:
-            print(f"Escalation notification error: {e}")
+            logger.error(f"Escalation notification error: {e}")
             return False
\ No newline at end of file
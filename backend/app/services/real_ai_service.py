@@ -4,14 +4,38 @@ import json
 import time
 import logging
 import aiohttp
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Static (no per-incident interpolation) so providers can reuse it as a cached prefix.
+# Keep it terse: every token here is paid on every analysis call.
+ANALYSIS_SYSTEM_PROMPT = (
+    "SRE incident analyst. Reply with one JSON object only, schema: "
+    '{"provider":str,"confidence_score":0-1,"predicted_severity":"CRITICAL|HIGH|MEDIUM|LOW",'
+    '"root_cause":str,"business_impact":str,"recommended_actions":[str],"auto_resolvable":bool,'
+    '"estimated_resolution_minutes":int,"technical_details":str,"prevention_steps":[str],'
+    '"monitoring_commands":[str]}. '
+    "Actions most urgent first; name concrete commands, configs or code changes."
+)
+
+class ProviderRateLimited(Exception):
+    """Provider answered 429; retried with backoff by RealAIService._post_json"""
+
+
+# Process-wide caps so alert storms queue locally instead of tripping provider rate limits
+_provider_semaphores = {
+    'claude': asyncio.Semaphore(settings.AI_PROVIDER_MAX_CONCURRENCY),
+    'gemini': asyncio.Semaphore(settings.AI_PROVIDER_MAX_CONCURRENCY)
+}
+
 class RealAIService:
     """Real AI service with BYOK integration - users bring their own API keys"""
     
@@ -84,81 +108,48 @@ class RealAIService:
                 'anthropic-version': '2023-06-01'
             }
             
-            # Enhanced prompt for better incident analysis
-            prompt = f"""You are an expert DevOps/SRE engineer specializing in incident response. Analyze this production incident:
-
-INCIDENT TITLE: {incident_data.get('title', 'Unknown incident')}
-DESCRIPTION: {incident_data.get('description', 'No description provided')}
-SEVERITY: {incident_data.get('severity', 'UNKNOWN')}
-AFFECTED SYSTEMS: {incident_data.get('affected_systems', [])}
-TAGS: {incident_data.get('tags', [])}
-
-Provide a detailed technical analysis with actionable recommendations. Respond with valid JSON:
-
-{{
-    "provider": "claude",
-    "confidence_score": 0.95,
-    "predicted_severity": "CRITICAL|HIGH|MEDIUM|LOW",
-    "root_cause": "Specific technical root cause analysis",
-    "business_impact": "Clear business impact description",
-    "recommended_actions": [
-        "Immediate action 1 - most critical",
-        "Action 2 - investigation step", 
-        "Action 3 - prevention measure"
-    ],
-    "auto_resolvable": true|false,
-    "estimated_resolution_minutes": 15,
-    "technical_details": "Additional technical context",
-    "prevention_steps": [
-        "Long-term prevention step 1",
-        "Prevention step 2"
-    ]
-}}
-
-Focus on practical, actionable solutions. Be specific about commands, configurations, or code changes needed."""
+            prompt = self._build_incident_prompt(incident_data, provider="claude")
             
             payload = {
                 'model': 'claude-3-5-sonnet-20241022',
                 'max_tokens': 1500,
+                'system': ANALYSIS_SYSTEM_PROMPT,
                 'messages': [{'role': 'user', 'content': prompt}]
             }
             
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(
-                    'https://api.anthropic.com/v1/messages',
-                    headers=headers,
-                    json=payload
-                ) as response:
+            status, body = await self._post_json(
+                'claude',
+                'https://api.anthropic.com/v1/messages',
+                payload,
+                headers=headers
+            )
+            
+            if status == 200:
+                content = body.get('content', [{}])[0].get('text', '')
+                
+                # Extract JSON from response
+                start_idx = content.find('{')
+                end_idx = content.rfind('}') + 1
+                
+                if start_idx >= 0 and end_idx > start_idx:
+                    json_str = content[start_idx:end_idx]
+                    parsed = json.loads(json_str)
+                    parsed['api_success'] = True
+                    parsed['api_source'] = 'user_byok' if 'claude' in self.user_api_keys else 'environment'
                     
-                    if response.status == 200:
-                        result = await response.json()
-                        content = result.get('content', [{}])[0].get('text', '')
-                        
-                        # Extract JSON from response
-                        start_idx = content.find('{')
-                        end_idx = content.rfind('}') + 1
-                        
-                        if start_idx >= 0 and end_idx > start_idx:
-                            json_str = content[start_idx:end_idx]
-                            parsed = json.loads(json_str)
-                            parsed['api_success'] = True
-                            parsed['api_source'] = 'user_byok' if 'claude' in self.user_api_keys else 'environment'
-                            
-                            # Update usage tracking in BYOK system
-                            if self.db and self.organization_id and 'claude' in self.user_api_keys:
-                                await self._update_api_key_usage('claude', len(content))
-                            
-                            logger.info(f"Claude analysis successful - confidence: {parsed.get('confidence_score', 0)}")
-                            return parsed
-                        else:
-                            logger.warning("Claude returned non-JSON response")
-                            return self._mock_analysis("claude", incident_data, api_error="JSON parsing failed")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Claude API error {response.status}: {error_text}")
-                        return self._mock_analysis("claude", incident_data, api_error=f"HTTP {response.status}")
-                        
+                    # Update usage tracking in BYOK system
+                    if self.db and self.organization_id and 'claude' in self.user_api_keys:
+                        await self._update_api_key_usage('claude', len(content))
+                    
+                    logger.info(f"Claude analysis successful - confidence: {parsed.get('confidence_score', 0)}")
+                    return parsed
+                else:
+                    logger.warning("Claude returned non-JSON response")
+                    return self._mock_analysis("claude", incident_data, api_error="JSON parsing failed")
+            else:
+                logger.error(f"Claude API error {status}: {body}")
+                return self._mock_analysis("claude", incident_data, api_error=f"HTTP {status}")
+                
         except Exception as e:
             logger.error(f"Claude analysis failed: {str(e)}")
             return self._mock_analysis("claude", incident_data, api_error=str(e))
@@ -174,42 +165,12 @@ Focus on practical, actionable solutions. Be specific about commands, configurat
             return self._mock_analysis("gemini", incident_data, api_error="No Gemini API key configured")
             
         try:
-            # Enhanced prompt for Gemini
-            prompt = f"""As a senior Site Reliability Engineer, analyze this production incident and provide structured recommendations:
-
-INCIDENT: {incident_data.get('title', 'Unknown incident')}
-DETAILS: {incident_data.get('description', 'No description provided')}
-SEVERITY: {incident_data.get('severity', 'UNKNOWN')}
-AFFECTED_SYSTEMS: {incident_data.get('affected_systems', [])}
-CONTEXT: {incident_data.get('tags', [])}
-
-Provide technical analysis in this exact JSON format:
-
-{{
-    "provider": "gemini",
-    "confidence_score": 0.90,
-    "predicted_severity": "CRITICAL|HIGH|MEDIUM|LOW", 
-    "root_cause": "Technical root cause with specific details",
-    "business_impact": "Business impact assessment",
-    "recommended_actions": [
-        "Priority 1: Immediate stabilization action",
-        "Priority 2: Investigation action",
-        "Priority 3: Resolution action"
-    ],
-    "auto_resolvable": false,
-    "estimated_resolution_minutes": 20,
-    "technical_details": "Additional technical analysis",
-    "monitoring_commands": [
-        "Command 1 for monitoring",
-        "Command 2 for diagnostics"
-    ]
-}}
-
-Be specific about commands, logs to check, and technical steps. Focus on rapid resolution."""
+            prompt = self._build_incident_prompt(incident_data, provider="gemini")
             
             url = f'https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent?key={self.gemini_api_key}'
             
             payload = {
+                'systemInstruction': {'parts': [{'text': ANALYSIS_SYSTEM_PROMPT}]},
                 'contents': [{'parts': [{'text': prompt}]}],
                 'generationConfig': {
                     'temperature': 0.1,
@@ -217,42 +178,38 @@ Be specific about commands, logs to check, and technical steps. Focus on rapid r
                 }
             }
             
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                async with session.post(url, json=payload) as response:
+            status, body = await self._post_json('gemini', url, payload)
+            
+            if status == 200:
+                candidates = body.get('candidates', [])
+                if candidates:
+                    content = candidates[0].get('content', {}).get('parts', [{}])[0].get('text', '')
                     
-                    if response.status == 200:
-                        result = await response.json()
-                        candidates = result.get('candidates', [])
-                        if candidates:
-                            content = candidates[0].get('content', {}).get('parts', [{}])[0].get('text', '')
-                            
-                            # Extract JSON
-                            start_idx = content.find('{')
-                            end_idx = content.rfind('}') + 1
-                            
-                            if start_idx >= 0 and end_idx > start_idx:
-                                json_str = content[start_idx:end_idx]
-                                parsed = json.loads(json_str)
-                                parsed['api_success'] = True
-                                parsed['api_source'] = 'user_byok' if 'gemini' in self.user_api_keys else 'environment'
-                                
-                                # Update usage tracking
-                                if self.db and self.organization_id and 'gemini' in self.user_api_keys:
-                                    await self._update_api_key_usage('gemini', len(content))
-                                
-                                logger.info(f"Gemini analysis successful - confidence: {parsed.get('confidence_score', 0)}")
-                                return parsed
-                            else:
-                                logger.warning("Gemini returned non-JSON response")
-                                return self._mock_analysis("gemini", incident_data, api_error="JSON parsing failed")
-                        else:
-                            return self._mock_analysis("gemini", incident_data, api_error="No candidates in response")
-                    else:
-                        error_text = await response.text()
-                        logger.error(f"Gemini API error {response.status}: {error_text}")
-                        return self._mock_analysis("gemini", incident_data, api_error=f"HTTP {response.status}")
+                    # Extract JSON
+                    start_idx = content.find('{')
+                    end_idx = content.rfind('}') + 1
+                    
+                    if start_idx >= 0 and end_idx > start_idx:
+                        json_str = content[start_idx:end_idx]
+                        parsed = json.loads(json_str)
+                        parsed['api_success'] = True
+                        parsed['api_source'] = 'user_byok' if 'gemini' in self.user_api_keys else 'environment'
                         
+                        # Update usage tracking
+                        if self.db and self.organization_id and 'gemini' in self.user_api_keys:
+                            await self._update_api_key_usage('gemini', len(content))
+                        
+                        logger.info(f"Gemini analysis successful - confidence: {parsed.get('confidence_score', 0)}")
+                        return parsed
+                    else:
+                        logger.warning("Gemini returned non-JSON response")
+                        return self._mock_analysis("gemini", incident_data, api_error="JSON parsing failed")
+                else:
+                    return self._mock_analysis("gemini", incident_data, api_error="No candidates in response")
+            else:
+                logger.error(f"Gemini API error {status}: {body}")
+                return self._mock_analysis("gemini", incident_data, api_error=f"HTTP {status}")
+                
         except Exception as e:
             logger.error(f"Gemini analysis failed: {str(e)}")
             return self._mock_analysis("gemini", incident_data, api_error=str(e))
@@ -291,11 +248,49 @@ Be specific about commands, logs to check, and technical steps. Focus on rapid r
             'gemini_analysis': gemini_result,
             'consensus': consensus,
             'processing_time': processing_time,
-            'timestamp': datetime.utcnow().isoformat(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
             'meets_sla': processing_time < 2.0,
             'byok_status': byok_status
         }
     
+    @retry(
+        retry=retry_if_exception_type(ProviderRateLimited),
+        wait=wait_random_exponential(multiplier=0.5, max=8),
+        stop=stop_after_attempt(3),
+        reraise=True
+    )
+    async def _post_json(
+        self,
+        provider: str,
+        url: str,
+        payload: Dict[str, Any],
+        headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Any]:
+        """POST to a provider under its concurrency cap; 429s are retried with jittered backoff"""
+        
+        # Backoff sleeps happen outside the semaphore so waiting callers can proceed
+        async with _provider_semaphores[provider]:
+            timeout = aiohttp.ClientTimeout(total=30)
+            async with aiohttp.ClientSession(timeout=timeout) as session:
+                async with session.post(url, headers=headers, json=payload) as response:
+                    if response.status == 429:
+                        raise ProviderRateLimited(f"{provider} rate limit exceeded")
+                    if response.status == 200:
+                        return response.status, await response.json()
+                    return response.status, await response.text()
+    
+    def _build_incident_prompt(self, incident_data: Dict[str, Any], provider: str) -> str:
+        """Per-incident user message; instructions live in ANALYSIS_SYSTEM_PROMPT"""
+        
+        return (
+            f"provider: {provider}\n"
+            f"title: {incident_data.get('title', 'Unknown incident')}\n"
+            f"description: {incident_data.get('description', 'No description provided')}\n"
+            f"severity: {incident_data.get('severity', 'UNKNOWN')}\n"
+            f"affected_systems: {incident_data.get('affected_systems', [])}\n"
+            f"tags: {incident_data.get('tags', [])}"
+        )
+    
     async def _update_api_key_usage(self, provider: str, tokens_used: int):
         """Update API key usage statistics in BYOK system"""
         
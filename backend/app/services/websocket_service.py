@@ -1,10 +1,41 @@
 # backend/app/services/websocket_service.py
 import logging
-from typing import Dict, Any, Set
+from typing import Dict, Any, List, Set
 import asyncio
+import orjson
 
 logger = logging.getLogger(__name__)
 
+# Deployment events are appended, already encoded, to f"{DEPLOYMENT_EVENTS_STREAM}:{deployment_id}";
+# each subscribed connection reads the stream and forwards the payloads as they are
+DEPLOYMENT_EVENTS_STREAM = "deploy:events"
+DEPLOYMENT_EVENTS_MAXLEN = 10000
+DEPLOYMENT_EVENTS_TTL_SECONDS = 24 * 3600
+DEPLOYMENT_EVENTS_BLOCK_MS = 15000
+
+def deployment_message(deployment_id: str, event: Dict[str, Any]) -> Dict[str, Any]:
+    """Envelope sent to deployment subscribers"""
+    return {
+        "type": event.get("type", "update"),
+        "deployment_id": deployment_id,
+        "data": event,
+        "timestamp": event.get("timestamp")
+    }
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Serialize a message once for all its recipients; naive datetimes are UTC"""
+    return orjson.dumps(message, option=orjson.OPT_NAIVE_UTC)
+
+async def publish_deployment_events(redis_client, deployment_id: str, events: List[Dict[str, Any]]):
+    """Encode deployment events once each and append them to the deployment's event stream"""
+    key = f"{DEPLOYMENT_EVENTS_STREAM}:{deployment_id}"
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for event in events:
+            payload = encode_message(deployment_message(deployment_id, event))
+            pipe.xadd(key, {"p": payload}, maxlen=DEPLOYMENT_EVENTS_MAXLEN, approximate=True)
+        pipe.expire(key, DEPLOYMENT_EVENTS_TTL_SECONDS)
+        await pipe.execute()
+
 class WebSocketManager:
     """Simple WebSocket manager for deployment updates"""
     
@@ -44,18 +75,13 @@ class WebSocketManager:
         connections = self.deployment_connections[deployment_id].copy()
         
         if connections:
-            message = {
-                "type": event.get("type", "update"),
-                "deployment_id": deployment_id,
-                "data": event,
-                "timestamp": event.get("timestamp")
-            }
+            message = encode_message(deployment_message(deployment_id, event)).decode()
             
             # Send to all connected clients for this deployment
             disconnected = set()
             for websocket in connections:
                 try:
-                    await websocket.send_json(message)
+                    await websocket.send_text(message)
                 except Exception as e:
                     logger.error(f"Failed to send message to websocket: {e}")
                     disconnected.add(websocket)
@@ -68,21 +94,64 @@ class WebSocketManager:
         else:
             logger.info(f"No active connections for deployment {deployment_id}")
     
+    async def stream_deployment(self, websocket, deployment_id: str, redis_client, last_event_id: str = "$"):
+        """Forward a deployment's event stream to one connection until it disconnects
+        
+        Every message carries its stream entry "id"; clients reconnecting with the id of
+        the last event they saw get the events they missed replayed first.
+        """
+        await self.connect(websocket, deployment_id)
+        key = f"{DEPLOYMENT_EVENTS_STREAM}:{deployment_id}"
+        
+        async def forward(last_event_id: str):
+            if last_event_id == "$":
+                # Pin "$" to an id so events added between blocking reads aren't skipped
+                latest = await redis_client.xrevrange(key, count=1)
+                last_event_id = latest[0][0] if latest else "0-0"
+            
+            while True:
+                entries = await redis_client.xread({key: last_event_id}, block=DEPLOYMENT_EVENTS_BLOCK_MS)
+                for _, messages in entries:
+                    for message_id, fields in messages:
+                        payload = fields.get("p") or fields.get(b"p")
+                        payload = payload if isinstance(payload, str) else payload.decode()
+                        message_id = message_id if isinstance(message_id, str) else message_id.decode()
+                        # Splice the stream id into the encoded envelope so clients can pass it back
+                        # as last_event_id when they reconnect
+                        await websocket.send_text(f'{{"id":"{message_id}",{payload[1:]}')
+                        last_event_id = message_id
+        
+        async def wait_for_disconnect():
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        
+        tasks = {asyncio.create_task(forward(last_event_id)), asyncio.create_task(wait_for_disconnect())}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception():
+                    logger.info(f"Deployment stream for {deployment_id} ended: {task.exception()}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self.disconnect(websocket, deployment_id)
+    
     async def broadcast_to_all(self, event: Dict[str, Any]):
         """Broadcast event to all connected clients"""
         if not self.active_connections:
             return
         
-        message = {
+        message = encode_message({
             "type": event.get("type", "broadcast"),
             "data": event,
             "timestamp": event.get("timestamp")
-        }
+        }).decode()
         
         disconnected = set()
         for websocket in self.active_connections.copy():
             try:
-                await websocket.send_json(message)
+                await websocket.send_text(message)
             except Exception as e:
                 logger.error(f"Failed to broadcast to websocket: {e}")
                 disconnected.add(websocket)